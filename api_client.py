@@ -1,79 +1,411 @@
 import requests
 import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Optional
+from disk_cache import DiskCache
+from request_policy import CircuitBreaker, CircuitOpenError, LatencyTracker
+from war_models import DynamicMapData, StaticMapData, WarData, WarReport, map_names_from_json
+
+# War API base URL of every shard
+SHARDS = {
+    "Able": "https://war-service-live.foxholeservices.com/api/worldconquest",
+    "Baker": "https://war-service-live-2.foxholeservices.com/api/worldconquest",
+    "Charlie": "https://war-service-live-3.foxholeservices.com/api/worldconquest",
+}
+DEFAULT_SHARD = "Able"
+
+def shard_cache_dir(shard: str) -> str:
+    """Directory holding the on-disk caches of one shard"""
+    return os.path.join("cache", shard)
+
+class _InFlightRequest:
+    """A request that concurrent callers for the same endpoint wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
 
 class FoxholeAPI:
     """Client for the Foxhole War API with caching support"""
     
-    BASE_URL = "https://war-service-live.foxholeservices.com/api/worldconquest"
+    BASE_URL = SHARDS[DEFAULT_SHARD]
+    MAX_WORKERS = 16  # Upper bound on concurrent requests during a sweep
     
-    def __init__(self):
+    # (connect, read) timeouts in seconds for each kind of endpoint
+    TIMEOUTS = {
+        'dynamic': (3.05, 10),
+        'static': (3.05, 20),
+        'warReport': (3.05, 10),
+        'war': (3.05, 10),
+        'maps': (3.05, 10),
+    }
+    MAX_RETRIES = 2  # Retries after the first attempt for timeouts, connection errors and 5xx
+    RETRY_BACKOFF = 0.5  # Base delay in seconds, doubled for every retry
+    HEDGE_DELAY = 1.0  # Seconds before a hedged request is sent when no p95 latency is known yet
+    
+    # Typed record each kind of endpoint is decoded into
+    PARSERS = {
+        'dynamic': DynamicMapData.from_json,
+        'static': StaticMapData.from_json,
+        'warReport': WarReport.from_json,
+        'war': WarData.from_json,
+        'maps': map_names_from_json,
+    }
+    
+    def __init__(self, disk_cache=None, base_url=None):
+        self.base_url = base_url or self.BASE_URL
+        self.disk_cache = disk_cache  # Optional DiskCache that keeps ETags and bodies across restarts
         self.session = requests.Session()
+        # Size the connection pool so a full sweep can reuse its connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.MAX_WORKERS)
+        self.session.mount("https://", adapter)
+        # Ask for compressed bodies; requests decompresses them transparently
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
         self.etags = {}  # Store ETags for each endpoint
-        self.cache = {}  # Store cached responses
+        self.cache = {}  # Store cached responses, already decoded into typed records
+        self.max_ages = {}  # Cache-Control max-age in seconds for each endpoint
+        self.lock = threading.Lock()
+        self.in_flight = {}  # (endpoint, params) -> _InFlightRequest
+        self.stats = {
+            'requests': 0,  # Requests sent upstream
+            'hits': 0,  # Responses served from cache (304s and cached-only reads)
+            'not_modified': 0,  # HTTP 304 responses
+            'coalesced': 0,  # Callers that shared another caller's in-flight request
+            'retries': 0,
+            'hedged': 0,  # Second requests sent because the first was slow
+            'breaker_served': 0,  # Cached responses served while the circuit breaker was open
+            'errors': 0,
+        }
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hedge")
         
-    def _make_request(self, endpoint, params=None):
-        """Make an API request with ETag support"""
-        url = f"{self.BASE_URL}/{endpoint}"
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def get_stats(self):
+        """Return a snapshot of the request counters"""
+        with self.lock:
+            return dict(self.stats)
+
+    def get_health(self):
+        """Return the circuit breaker state and latency percentiles per endpoint kind"""
+        return {
+            'breaker': self.breaker.state,
+            'latency': self.latency.summary(),
+        }
+
+    @staticmethod
+    def _endpoint_kind(endpoint):
+        """Classify an endpoint for timeouts and latency tracking"""
+        if endpoint.startswith("maps/"):
+            return 'static' if endpoint.endswith("/static") else 'dynamic'
+        if endpoint.startswith("warReport/"):
+            return 'warReport'
+        if endpoint == "maps":
+            return 'maps'
+        return 'war'
+        
+    def _load_from_disk(self, endpoint):
+        """Seed the in-memory ETag and response caches from the disk cache"""
+        if self.disk_cache is None or endpoint in self.etags:
+            return
+        entry = self.disk_cache.get(endpoint)
+        if entry is None:
+            return
+        try:
+            self.cache[endpoint] = self._parse(endpoint, entry.data)
+        except ValueError as e:
+            print(f"Ignoring invalid cached data for {endpoint}: {e}")
+            return
+        self.etags[endpoint] = entry.etag
+
+    def _parse(self, endpoint, data):
+        """Validate a decoded JSON payload and convert it into its typed record"""
+        return self.PARSERS[self._endpoint_kind(endpoint)](data)
+
+    def get_cached(self, endpoint):
+        """Return the last known response for an endpoint without a network request"""
+        self._load_from_disk(endpoint)
+        data = self.cache.get(endpoint)
+        if data is not None:
+            self._count('hits')
+        return data
+
+    def _make_request(self, endpoint, params=None, cached_only=False, hedge=False):
+        """
+        Make an API request with ETag support
+        
+        Concurrent callers asking for the same endpoint share a single
+        upstream request and its result.
+        
+        Args:
+            endpoint: Endpoint path relative to base_url
+            params: Optional query parameters
+            cached_only: Return the last known response (possibly stale) instead of
+                making a request; None if nothing is cached
+            hedge: Send a second request if the first is slower than the usual
+                p95 latency, and use whichever answers first
+        """
+        if cached_only:
+            return self.get_cached(endpoint)
+        
+        key = (endpoint, tuple(sorted(params.items())) if params else None)
+        with self.lock:
+            call = self.in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self.in_flight[key] = _InFlightRequest()
+            else:
+                self.stats['coalesced'] += 1
+        
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = self._fetch_with_retries(endpoint, params, hedge)
+            return call.result
+        except Exception as e:
+            call.error = e
+            self._count('errors')
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+
+    def _fetch_with_retries(self, endpoint, params, hedge):
+        """Fetch through the circuit breaker, retrying transient failures with backoff"""
+        if not self.breaker.allow_request():
+            cached = self.get_cached(endpoint)
+            if cached is not None:
+                self._count('breaker_served')
+                return cached
+            raise CircuitOpenError(f"War API circuit breaker is open, no cached data for {endpoint}")
+        
+        attempt = 0
+        while True:
+            try:
+                if hedge:
+                    result = self._fetch_hedged(endpoint, params)
+                else:
+                    result = self._fetch(endpoint, params)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                if status < 500 and status != 429:
+                    # The service answered; the request itself is wrong
+                    self.breaker.record_success()
+                    raise
+                error = e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                # Unreadable or invalid responses are not retried, but must still
+                # count against the breaker (and end a half-open probe)
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            
+            self.breaker.record_failure()
+            if attempt >= self.MAX_RETRIES or self.breaker.state != CircuitBreaker.CLOSED:
+                raise error
+            attempt += 1
+            self._count('retries')
+            delay = self.RETRY_BACKOFF * (2 ** (attempt - 1))
+            time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def _fetch_hedged(self, endpoint, params):
+        """Race a second request against a slow first one and return the first success"""
+        hedge_delay = self.latency.percentile(self._endpoint_kind(endpoint), 95) or self.HEDGE_DELAY
+        first = self.hedge_executor.submit(self._fetch, endpoint, params)
+        done, _ = wait([first], timeout=hedge_delay)
+        if done:
+            return first.result()
+        
+        self._count('hedged')
+        pending = {first, self.hedge_executor.submit(self._fetch, endpoint, params)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _fetch(self, endpoint, params=None):
+        """Send one conditional GET and update the caches"""
+        url = f"{self.base_url}/{endpoint}"
         headers = {}
+        self._load_from_disk(endpoint)
         
         # Add If-None-Match header if we have a cached ETag
         if endpoint in self.etags:
             headers['If-None-Match'] = self.etags[endpoint]
         
-        response = self.session.get(url, headers=headers, params=params)
+        self._count('requests')
+        kind = self._endpoint_kind(endpoint)
+        started = time.monotonic()
+        response = self.session.get(url, headers=headers, params=params, timeout=self.TIMEOUTS[kind])
+        self.latency.record(kind, time.monotonic() - started)
+        
+        self._store_max_age(endpoint, response.headers.get('Cache-Control'))
         
         # Handle 304 Not Modified
         if response.status_code == 304:
             print(f"Cache hit for {endpoint}")
+            self._count('not_modified')
+            self._count('hits')
+            if self.disk_cache is not None:
+                self.disk_cache.touch(endpoint)
             return self.cache[endpoint]
         
         # Handle successful response
         if response.status_code == 200:
+            # Decode and validate the body exactly once
+            data = self._parse(endpoint, response.json())
             # Store the new ETag if provided
             if 'ETag' in response.headers:
+                self.cache[endpoint] = data
                 self.etags[endpoint] = response.headers['ETag']
-                self.cache[endpoint] = response.json()
-            return response.json()
+                if self.disk_cache is not None:
+                    self.disk_cache.put(endpoint, response.headers['ETag'], response.content)
+            return data
         
         # Handle errors
         response.raise_for_status()
         return None
 
-    def get_map_data(self, map_name: str) -> Dict[str, Any]:
+    def _store_max_age(self, endpoint, cache_control):
+        """Remember the max-age directive of a Cache-Control header"""
+        max_age = None
+        for directive in (cache_control or "").split(','):
+            name, _, value = directive.strip().partition('=')
+            if name.lower() == 'max-age' and value.strip().isdigit():
+                max_age = int(value)
+        self.max_ages[endpoint] = max_age
+
+    def get_max_age(self, endpoint):
+        """Return the last Cache-Control max-age seen for an endpoint, or None"""
+        return self.max_ages.get(endpoint)
+
+    @staticmethod
+    def map_data_endpoint(map_name: str) -> str:
+        return f"maps/{map_name}/dynamic/public"
+
+    def get_map_data(self, map_name: str, cached_only: bool = False, hedge: bool = False) -> Optional[DynamicMapData]:
         """
         Fetch dynamic map data for a specific map
         
         Args:
             map_name: Name of the map to fetch data for
+            cached_only: Return the last cached data without a network request
+            hedge: Race a second request if the first is slow (for interactive use)
+            
+        Returns:
+            DynamicMapData with the map's items
+        """
+        return self._make_request(self.map_data_endpoint(map_name), cached_only=cached_only, hedge=hedge)
+
+    def _fetch_all(self, fetch, map_names, max_workers=None):
+        """Call fetch(map_name) for every map on a bounded worker pool, once per map"""
+        map_names = list(dict.fromkeys(map_names))
+        if not map_names:
+            return {}
+        
+        workers = min(max_workers or self.MAX_WORKERS, len(map_names))
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(fetch, name) for name in map_names}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Error fetching {name}: {e}")
+                    results[name] = None
+        return results
+
+    def get_all_map_data(self, map_names: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Optional[DynamicMapData]]:
+        """
+        Fetch dynamic map data for several maps concurrently
+        
+        Every map is requested exactly once on a bounded worker pool, so a
+        sweep over all hexes takes about as long as the slowest request.
+        
+        Args:
+            map_names: API names of the maps to fetch
+            max_workers: Maximum number of concurrent requests (defaults to MAX_WORKERS)
             
         Returns:
-            Dictionary containing map data
+            Dictionary mapping each map name to its data, or None if the fetch failed
         """
-        return self._make_request(f"maps/{map_name}/dynamic/public")
+        return self._fetch_all(self.get_map_data, map_names, max_workers)
+
+    def get_all_static_map_data(self, map_names: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Optional[StaticMapData]]:
+        """Fetch static map data for several maps concurrently (see get_all_map_data)"""
+        return self._fetch_all(self.get_static_map_data, map_names, max_workers)
 
-    def get_static_map_data(self, map_name: str) -> Dict[str, Any]:
+    def get_static_map_data(self, map_name: str, cached_only: bool = False) -> Optional[StaticMapData]:
         """Get static map data (text labels, etc) for a specific map"""
-        return self._make_request(f"maps/{map_name}/static")
+        return self._make_request(f"maps/{map_name}/static", cached_only=cached_only)
 
-    def get_war_data(self) -> Dict[str, Any]:
+    def get_war_data(self, cached_only: bool = False) -> Optional[WarData]:
         """
         Fetch current war data
         
         Returns:
-            Dictionary containing war status data
+            WarData describing the current war
         """
-        return self._make_request("war")
+        return self._make_request("war", cached_only=cached_only)
 
-    def get_war_report(self, map_name: str) -> Dict[str, Any]:
+    def get_map_names(self, cached_only: bool = False) -> Optional[tuple]:
+        """
+        Fetch the API names of every map in the current war
+        
+        Returns:
+            Tuple of map names such as 'DeadLandsHex'
+        """
+        return self._make_request("maps", cached_only=cached_only)
+
+    def get_war_report(self, map_name: str, cached_only: bool = False, hedge: bool = False) -> Optional[WarReport]:
         """
         Get war report data for a specific map
         
         Args:
             map_name: Name of the map to fetch war report data for
+            cached_only: Return the last cached report without a network request
+            hedge: Race a second request if the first is slow (for interactive use)
             
         Returns:
-            Dictionary containing war report data
+            WarReport for the map
         """
-        return self._make_request(f"warReport/{map_name}")
+        return self._make_request(f"warReport/{map_name}", cached_only=cached_only, hedge=hedge)
+
+
+_shared_apis = {}  # shard -> FoxholeAPI
+_shared_api_lock = threading.Lock()
+
+def get_shared_api(shard: str = DEFAULT_SHARD) -> FoxholeAPI:
+    """
+    Return the process-wide FoxholeAPI client for a shard, creating it on first use
+    
+    Each shard gets its own session (connection pool), ETag table and disk cache.
+    """
+    with _shared_api_lock:
+        if shard not in _shared_apis:
+            disk_cache = DiskCache(os.path.join(shard_cache_dir(shard), "http_cache.sqlite3"))
+            _shared_apis[shard] = FoxholeAPI(disk_cache=disk_cache, base_url=SHARDS[shard])
+        return _shared_apis[shard]
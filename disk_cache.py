@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "http_cache.sqlite3")
+
+class CacheEntry(NamedTuple):
+    etag: str
+    data: Any
+    fetched_at: float  # Unix time of the last 200 or 304 for this endpoint
+
+def open_or_recreate(path, connect, description):
+    """
+    Open an SQLite database, deleting and recreating it if the file is corrupt
+
+    Args:
+        path: Database file
+        connect: Callable opening a connection to path and creating the schema
+        description: What the database holds, for the warning (e.g. "HTTP cache")
+
+    Returns:
+        The connection
+    """
+    conn = None
+    try:
+        conn = connect()
+        if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+            raise sqlite3.DatabaseError("quick_check failed")
+        return conn
+    except sqlite3.DatabaseError as e:
+        print(f"{description} at {path} is corrupt ({e}), recreating it")
+        if conn is not None:
+            conn.close()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return connect()
+
+class DiskCache:
+    """Size-bounded, LRU-evicted store of ETags and response bodies that survives restarts"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = open_or_recreate(path, self._connect, "HTTP cache")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                endpoint TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def get(self, endpoint) -> Optional[CacheEntry]:
+        """Return the cached entry for an endpoint, or None if missing or unreadable"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, body, fetched_at FROM entries WHERE endpoint = ?", (endpoint,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                data = json.loads(row[1])
+            except (ValueError, TypeError):
+                # Drop bodies that no longer decode rather than serving garbage
+                self.conn.execute("DELETE FROM entries WHERE endpoint = ?", (endpoint,))
+                self.conn.commit()
+                return None
+            self.conn.execute(
+                "UPDATE entries SET last_access = ? WHERE endpoint = ?", (time.time(), endpoint)
+            )
+            self.conn.commit()
+            return CacheEntry(row[0], data, row[2])
+
+    def put(self, endpoint, etag, body: bytes):
+        """Store a response body and its ETag, evicting least recently used entries if needed"""
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (endpoint, etag, body, size, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (endpoint, etag, sqlite3.Binary(body), len(body), now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, endpoint):
+        """Record that an endpoint was revalidated (HTTP 304) just now"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ? WHERE endpoint = ?",
+                (now, now, endpoint)
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for endpoint, size in self.conn.execute(
+            "SELECT endpoint, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            self.conn.execute("DELETE FROM entries WHERE endpoint = ?", (endpoint,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def size(self):
+        """Return the total size of all cached bodies in bytes"""
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
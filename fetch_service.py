@@ -0,0 +1,234 @@
+import os
+import threading
+import traceback
+import requests
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from api_client import DEFAULT_SHARD, get_shared_api, shard_cache_dir
+from history_store import HistoryStore
+from snapshot_store import SnapshotStore
+from static_store import StaticMapStore
+
+CPH_REPORTS_URL = "https://foxholemapviewerapi-shaneeexd.pythonanywhere.com"
+CPH_REPORTS_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+
+# Queue priorities; higher values are taken off the queue first
+PRIORITY_INTERACTIVE = 10  # Fetches for the map the user has selected
+PRIORITY_BACKGROUND = 0  # Sweeps and other periodic refreshes
+
+class _FetchJob(QRunnable):
+    """QRunnable wrapper so queued jobs can be taken back off the pool"""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+
+    def run(self):
+        self.fn()
+
+class FetchService(QObject):
+    """
+    Runs War API requests on a background thread pool
+
+    Map results are recorded in the shard's HistoryStore on the worker thread
+    and published into its SnapshotStore; other results and request state
+    are reported through signals.
+    """
+
+    # Signals carrying finished results; they are delivered on the GUI thread
+    sweep_ready = Signal(object)  # Read-only {map_name: HexSnapshot} once a sweep is published
+    remote_reports_ready = Signal(object)  # list of historical war reports
+
+    # Signals describing request state
+    request_started = Signal(str)  # request key
+    request_finished = Signal(str)  # request key
+    request_failed = Signal(str, str)  # (request key, error message)
+    request_cancelled = Signal(str)  # request key
+
+    def __init__(self, shard=DEFAULT_SHARD, api=None, max_threads=4, serve_stale=True, parent=None):
+        super().__init__(parent)
+        self.shard = shard
+        self.api = api or get_shared_api(shard)
+        self.static_store = StaticMapStore(self.api, os.path.join(shard_cache_dir(shard), "static_maps.json"))
+        self.store = SnapshotStore(self)
+        self.history = HistoryStore(os.path.join(shard_cache_dir(shard), "history.sqlite3"))
+        self.serve_stale = serve_stale  # Publish last known data immediately, then revalidate
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.lock = threading.Lock()
+        self.in_flight = set()  # Keys of requests queued or running
+        self.queued = {}  # Keys of requests not yet started -> _FetchJob
+        self.running = {}  # Keys of started requests -> _FetchJob (kept alive until done)
+        self.selected_map = None  # Map whose fetches are interactive; others are dropped
+        self.revalidated = set()  # Keys fetched from the network at least once this session
+
+    def reset_revalidation(self):
+        """Serve cached data first again on the next fetches, e.g. when switching back to this shard"""
+        self.revalidated.clear()
+
+    def is_busy(self):
+        """Return True while any request is in flight"""
+        return bool(self.in_flight)
+
+    def _submit(self, key, job, on_result, priority=PRIORITY_BACKGROUND):
+        """Queue job on the pool unless a request with the same key is already in flight"""
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            self.in_flight.add(key)
+        self.request_started.emit(key)
+
+        def run():
+            with self.lock:
+                fetch_job = self.queued.pop(key, None)
+                if fetch_job is None:
+                    return  # Cancelled while we were being dequeued
+                self.running[key] = fetch_job
+            try:
+                result = job()
+            except Exception as e:
+                traceback.print_exc()
+                self._finish(key)
+                self.request_failed.emit(key, str(e))
+                return
+            self._finish(key)
+            if result is not None:
+                self.revalidated.add(key)
+            on_result(result)
+            self.request_finished.emit(key)
+
+        fetch_job = _FetchJob(run)
+        with self.lock:
+            self.queued[key] = fetch_job
+        self.pool.start(fetch_job, priority)
+        return True
+
+    def _finish(self, key):
+        with self.lock:
+            self.running.pop(key, None)
+            self.in_flight.discard(key)
+
+    def cancel(self, key):
+        """Take a request off the queue if it has not started yet"""
+        with self.lock:
+            fetch_job = self.queued.pop(key, None)
+            if fetch_job is None:
+                return False
+            self.pool.tryTake(fetch_job)
+            self.in_flight.discard(key)
+        self.request_cancelled.emit(key)
+        return True
+
+    def select_map(self, map_name):
+        """Make map_name the interactive map and cancel queued fetches for any other map"""
+        self.selected_map = map_name
+        with self.lock:
+            stale_keys = [key for key in self.queued if key.startswith("map:") and key != f"map:{map_name}"]
+        for key in stale_keys:
+            self.cancel(key)
+
+    def _record(self, map_name, map_data):
+        """Add fresh dynamic data to the history; called on worker threads"""
+        try:
+            self.history.record(map_name, map_data)
+        except Exception as e:
+            print(f"Error recording history for {map_name}: {e}")
+        return map_data
+
+    def _record_all(self, all_map_data):
+        for map_name, map_data in all_map_data.items():
+            self._record(map_name, map_data)
+        return all_map_data
+
+    def fetch_map(self, map_name):
+        """
+        Fetch dynamic data, static data and the war report for one map
+
+        The map becomes the selected map: its fetch jumps ahead of background
+        work, queued fetches for other maps are cancelled, and a fetch that is
+        already running for a map that is no longer selected stops between
+        requests and drops its result.
+        """
+        self.select_map(map_name)
+        key = f"map:{map_name}"
+        if self.serve_stale and key not in self.revalidated:
+            map_data = self.api.get_map_data(map_name, cached_only=True)
+            if map_data is not None:
+                self.store.publish(
+                    map_name,
+                    dynamic=map_data,
+                    static=self.static_store.get_cached(map_name),
+                    war_report=self.api.get_war_report(map_name, cached_only=True)
+                )
+
+        def job():
+            result = []
+            fetches = (
+                lambda: self._record(map_name, self.api.get_map_data(map_name, hedge=True)),
+                lambda: self.static_store.get(map_name),
+                lambda: self.api.get_war_report(map_name, hedge=True)
+            )
+            for fetch in fetches:
+                if self.selected_map != map_name:
+                    return None
+                result.append(fetch())
+            return result
+
+        def on_result(result):
+            if result is not None and self.selected_map == map_name:
+                dynamic, static, war_report = result
+                self.store.publish(map_name, dynamic=dynamic, static=static, war_report=war_report)
+
+        return self._submit(key, job, on_result, PRIORITY_INTERACTIVE)
+
+    def _publish_sweep(self, all_map_data):
+        """Publish the dynamic data of a sweep as one revision and announce it"""
+        self.store.publish_many({name: {'dynamic': data} for name, data in all_map_data.items()})
+        self.sweep_ready.emit(self.store.snapshots())
+
+    def fetch_all_maps(self, map_names):
+        """Fetch dynamic data for every map in one concurrent sweep"""
+        map_names = list(map_names)
+        if self.serve_stale and "sweep" not in self.revalidated:
+            cached = {name: self.api.get_map_data(name, cached_only=True) for name in map_names}
+            if any(data is not None for data in cached.values()):
+                self._publish_sweep(cached)
+        return self._submit(
+            "sweep", lambda: self._record_all(self.api.get_all_map_data(map_names)),
+            self._publish_sweep
+        )
+
+    def refresh_static_data(self, map_names):
+        """Prefetch static data for every map, or just check the war number if already stored"""
+        map_names = list(map_names)
+
+        def on_result(changed):
+            if changed:
+                self.store.publish_many({
+                    name: {'static': self.static_store.get_cached(name)} for name in map_names
+                })
+
+        return self._submit("static", lambda: self.static_store.refresh(map_names), on_result)
+
+    def fetch_remote_war_reports(self):
+        """Fetch the historical war reports used for CPH calculations"""
+        def job():
+            response = requests.get(CPH_REPORTS_URL, timeout=CPH_REPORTS_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+            if 'reports' not in data:
+                raise ValueError("Invalid data format received from server - missing 'reports' key")
+            return data['reports']
+
+        return self._submit("war_reports", job, self.remote_reports_ready.emit)
+
+    def cancel_all(self):
+        """Take every request that has not started yet off the queue"""
+        with self.lock:
+            keys = list(self.queued)
+        for key in keys:
+            self.cancel(key)
+
+    def wait_for_done(self, msecs=-1):
+        """Block until all queued requests have finished (used on shutdown, after cancel_all)"""
+        return self.pool.waitForDone(msecs)
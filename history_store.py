@@ -0,0 +1,263 @@
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import numpy as np
+from disk_cache import open_or_recreate
+from snapshot_diff import diff_snapshots
+from war_models import DynamicMapData
+
+DEFAULT_HISTORY_PATH = os.path.join("cache", "history.sqlite3")
+
+# Array layouts of the two record kinds; each blob is a count header followed by the raw arrays
+_COLUMN_DTYPES = (np.float32, np.float32, np.int16, np.int8, np.uint8)  # x, y, icon_type, team, flags
+_KEYFRAME_LAYOUT = _COLUMN_DTYPES
+_DELTA_LAYOUT = (np.int32, np.int32, np.int8, np.uint8) + _COLUMN_DTYPES  # removed, changed, team, flags, added columns
+
+class HistoryEntry(NamedTuple):
+    seq: int  # Position in the hex's timeline, starting at 0
+    version: Optional[int]
+    last_updated: Optional[int]  # Upstream lastUpdated in milliseconds since the epoch
+    recorded_at: float  # Unix time the snapshot was recorded
+
+def _pack(arrays):
+    header = struct.pack(f"<{len(arrays)}I", *(len(array) for array in arrays))
+    return zlib.compress(header + b"".join(np.ascontiguousarray(array).tobytes() for array in arrays))
+
+def _unpack(blob, layout):
+    raw = zlib.decompress(blob)
+    counts = struct.unpack_from(f"<{len(layout)}I", raw)
+    offset = struct.calcsize(f"<{len(layout)}I")
+    arrays = []
+    for count, dtype in zip(counts, layout):
+        arrays.append(np.frombuffer(raw, dtype=dtype, count=count, offset=offset))
+        offset += count * np.dtype(dtype).itemsize
+    return arrays
+
+def _columns(map_data):
+    return (map_data.x, map_data.y, map_data.icon_type, map_data.team, map_data.flags)
+
+class _HexTimeline:
+    """In-memory index of one hex's recorded snapshots"""
+
+    def __init__(self):
+        self.entries = []  # HistoryEntry per seq
+        self.keyframes = []  # Seqs stored as keyframes, ascending
+        self.region_id = None
+        self.latest = None  # Reconstructed DynamicMapData of the last entry
+
+class HistoryStore:
+    """
+    Every distinct dynamic snapshot of every hex, stored as compressed keyframes plus deltas
+
+    A keyframe holds all item columns; the snapshots in between only store
+    what diff_snapshots found (removed and changed indices, new team and
+    flags, added items), each zlib-compressed in SQLite. Reconstructing a
+    past state decodes the nearest keyframe and applies at most
+    KEYFRAME_INTERVAL - 1 deltas, and recently reconstructed states are
+    cached so scrubbing through a timeline only applies one delta per step.
+    """
+
+    KEYFRAME_INTERVAL = 64
+    STATE_CACHE_SIZE = 32
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = open_or_recreate(path, self._connect, "History")
+        self.timelines = {}  # map_name -> _HexTimeline, loaded on first use
+        self.states = OrderedDict()  # (map_name, seq) -> DynamicMapData, least recently used first
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # History can be rebuilt from upstream, so skip the fsync on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                map_name TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                version INTEGER,
+                last_updated INTEGER,
+                recorded_at REAL NOT NULL,
+                region_id INTEGER,
+                keyframe INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                PRIMARY KEY (map_name, seq)
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def _timeline(self, map_name):
+        """Return the index of a hex, loading it from disk on first use (lock held)"""
+        timeline = self.timelines.get(map_name)
+        if timeline is None:
+            timeline = _HexTimeline()
+            for seq, version, last_updated, recorded_at, region_id, keyframe in self.conn.execute(
+                "SELECT seq, version, last_updated, recorded_at, region_id, keyframe "
+                "FROM snapshots WHERE map_name = ? ORDER BY seq", (map_name,)
+            ):
+                timeline.entries.append(HistoryEntry(seq, version, last_updated, recorded_at))
+                timeline.region_id = region_id
+                if keyframe:
+                    timeline.keyframes.append(seq)
+            self.timelines[map_name] = timeline
+        return timeline
+
+    def record(self, map_name, map_data, recorded_at=None):
+        """
+        Record a snapshot of a hex unless it matches the last recorded one
+
+        Args:
+            map_name: API map name
+            map_data: DynamicMapData
+            recorded_at: Unix time (defaults to time.time())
+
+        Returns:
+            True if a new entry was recorded
+        """
+        if map_data is None:
+            return False
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        with self.lock:
+            timeline = self._timeline(map_name)
+            if timeline.entries and timeline.latest is None:
+                timeline.latest = self._reconstruct(map_name, timeline, len(timeline.entries) - 1)
+            previous = timeline.latest
+            if previous is not None and map_data.version is not None and map_data.version == previous.version:
+                return False
+
+            seq = len(timeline.entries)
+            diff = diff_snapshots(previous, map_data) if previous is not None else None
+            if previous is not None and not diff:
+                return False
+
+            keyframe = previous is None or seq - timeline.keyframes[-1] >= self.KEYFRAME_INTERVAL
+            if keyframe:
+                state = map_data
+                body = _pack(_columns(map_data))
+            else:
+                delta = (
+                    diff.removed.astype(np.int32),
+                    diff.changed_old.astype(np.int32),
+                    map_data.team[diff.changed],
+                    map_data.flags[diff.changed],
+                ) + tuple(column[diff.added] for column in _columns(map_data))
+                body = _pack(delta)
+                # Keep the reconstructed order so later deltas index the same arrays on replay
+                state = self._apply_delta(previous, delta, map_data.region_id, map_data.last_updated, map_data.version)
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshots "
+                "(map_name, seq, version, last_updated, recorded_at, region_id, keyframe, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (map_name, seq, map_data.version, map_data.last_updated, recorded_at,
+                 map_data.region_id, int(keyframe), sqlite3.Binary(body))
+            )
+            self.conn.commit()
+            timeline.entries.append(HistoryEntry(seq, map_data.version, map_data.last_updated, recorded_at))
+            timeline.region_id = map_data.region_id
+            if keyframe:
+                timeline.keyframes.append(seq)
+            timeline.latest = state
+            self._cache_state(map_name, seq, state)
+            return True
+
+    @staticmethod
+    def _apply_delta(state, delta, region_id, last_updated, version):
+        """Return state with a delta applied, as a snapshot with the given metadata"""
+        removed, changed, team, flags, *added = delta
+        team_column = state.team.copy()
+        flags_column = state.flags.copy()
+        team_column[changed] = team
+        flags_column[changed] = flags
+        keep = np.ones(len(state), dtype=bool)
+        keep[removed] = False
+        columns = [
+            np.concatenate([column[keep], new_items])
+            for column, new_items in zip((state.x, state.y, state.icon_type, team_column, flags_column), added)
+        ]
+        return DynamicMapData(region_id, *columns, last_updated, version)
+
+    def _load_body(self, map_name, seq):
+        row = self.conn.execute(
+            "SELECT body FROM snapshots WHERE map_name = ? AND seq = ?", (map_name, seq)
+        ).fetchone()
+        return row[0]
+
+    def _reconstruct(self, map_name, timeline, seq):
+        """Rebuild the state of a hex at seq from the nearest cached state or keyframe (lock held)"""
+        cached = self.states.get((map_name, seq))
+        if cached is not None:
+            self.states.move_to_end((map_name, seq))
+            return cached
+
+        keyframe = timeline.keyframes[np.searchsorted(timeline.keyframes, seq, side='right') - 1]
+        start = keyframe
+        state = None
+        # Continue from the closest cached state after the keyframe, if any
+        for candidate in range(seq - 1, keyframe - 1, -1):
+            state = self.states.get((map_name, candidate))
+            if state is not None:
+                start = candidate + 1
+                break
+        if state is None:
+            entry = timeline.entries[keyframe]
+            columns = _unpack(self._load_body(map_name, keyframe), _KEYFRAME_LAYOUT)
+            state = DynamicMapData(timeline.region_id, *columns, entry.last_updated, entry.version)
+            start = keyframe + 1
+
+        for step in range(start, seq + 1):
+            entry = timeline.entries[step]
+            delta = _unpack(self._load_body(map_name, step), _DELTA_LAYOUT)
+            state = self._apply_delta(state, delta, timeline.region_id, entry.last_updated, entry.version)
+        self._cache_state(map_name, seq, state)
+        return state
+
+    def _cache_state(self, map_name, seq, state):
+        self.states[(map_name, seq)] = state
+        self.states.move_to_end((map_name, seq))
+        while len(self.states) > self.STATE_CACHE_SIZE:
+            self.states.popitem(last=False)
+
+    def timeline(self, map_name):
+        """Return the HistoryEntry of every recorded snapshot of a hex, oldest first"""
+        with self.lock:
+            return list(self._timeline(map_name).entries)
+
+    def state_at(self, map_name, seq):
+        """
+        Return the DynamicMapData of a hex as recorded at seq
+
+        Items keep their identity and attributes, but not necessarily the
+        order of the original payload.
+        """
+        with self.lock:
+            timeline = self._timeline(map_name)
+            if not 0 <= seq < len(timeline.entries):
+                raise IndexError(f"No snapshot {seq} recorded for {map_name}")
+            return self._reconstruct(map_name, timeline, seq)
+
+    def size(self):
+        """Return the total size of all stored snapshots in bytes"""
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM snapshots").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM snapshots")
+            self.conn.commit()
+            self.timelines.clear()
+            self.states.clear()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,113 @@
+from PySide6.QtCore import QRectF, Qt
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap
+from map_icons import (TeamID, ICON_COLORS, ICON_PATHS, STRUCTURE_COLORS, TEAM_COLORED_STRUCTURES,
+                       ORANGE_COLORED_STRUCTURES, BRIGHT_ORANGE_COLORED_STRUCTURES, YELLOW_COLORED_STRUCTURES,
+                       GREY_COLORED_STRUCTURES)
+
+ICON_SIZE = 32  # Icons are drawn at a constant 32x32 logical pixels, centred on their position
+TINT_ALPHA = 180  # Opacity of the multiplied tint (about 70%)
+
+# Tint of the icon types coloured the same for every team
+_FIXED_TINTS = {}
+for _icon_types, _color in (
+    (ORANGE_COLORED_STRUCTURES, "ORANGE"),
+    (BRIGHT_ORANGE_COLORED_STRUCTURES, "BRIGHT_ORANGE"),
+    (YELLOW_COLORED_STRUCTURES, "YELLOW"),
+    (GREY_COLORED_STRUCTURES, "DARK_GREY"),
+):
+    for _icon_type in _icon_types:
+        _FIXED_TINTS[_icon_type] = STRUCTURE_COLORS[_color]
+
+def tint_color(icon_type, team):
+    """
+    Return the colour an icon is tinted with, or None if it is drawn as is
+
+    Args:
+        icon_type: IconType value
+        team: Team name ('WARDENS', 'COLONIALS' or 'NONE')
+    """
+    if icon_type in TEAM_COLORED_STRUCTURES and team != TeamID.NONE.value:
+        return ICON_COLORS.get(TeamID(team), "#808080")
+    return _FIXED_TINTS.get(icon_type)
+
+def _possible_tints(icon_type):
+    if icon_type in TEAM_COLORED_STRUCTURES:
+        return [None] + [ICON_COLORS[team] for team in (TeamID.COLONIALS, TeamID.WARDENS)]
+    return [_FIXED_TINTS.get(icon_type)]
+
+class IconAtlas:
+    """
+    Every map icon decoded once and pre-tinted, one pixmap per (icon type, tint, device pixel ratio)
+
+    Tinting draws the icon, then multiplies a TINT_ALPHA copy filled with the
+    tint colour over it, exactly once per combination; painting an icon is
+    then a single drawPixmap. Icons share a tint per colour class (team or
+    resource colour), so the atlas stays small no matter how many items use it.
+    """
+
+    def __init__(self):
+        self.sources = {}  # icon path -> decoded QImage, or None if it cannot be read
+        self.pixmaps = {}  # (icon_type, tint, device_pixel_ratio) -> QPixmap, or None for the emoji fallback
+
+    def preload(self, device_pixel_ratio=1.0):
+        """Build the pixmap of every icon type and tint it can be drawn with"""
+        for icon_type in ICON_PATHS:
+            for tint in _possible_tints(icon_type):
+                self._pixmap(int(icon_type), tint, device_pixel_ratio)
+
+    def pixmap(self, icon_type, team, device_pixel_ratio=1.0):
+        """Return the pixmap to draw an icon for a team with, or None if it has no usable image"""
+        return self._pixmap(icon_type, tint_color(icon_type, team), device_pixel_ratio)
+
+    def _pixmap(self, icon_type, tint, device_pixel_ratio):
+        key = (icon_type, tint, device_pixel_ratio)
+        try:
+            return self.pixmaps[key]
+        except KeyError:
+            pass
+        image = self._source(ICON_PATHS.get(icon_type))
+        pixmap = None if image is None else self._render(image, tint, device_pixel_ratio)
+        self.pixmaps[key] = pixmap
+        return pixmap
+
+    def _source(self, icon_path):
+        """Decode an icon file, falling back to a PNG next to it; failures are reported once"""
+        if icon_path is None:
+            return None
+        if icon_path not in self.sources:
+            image = QImage(icon_path)
+            if image.isNull():
+                image = QImage(icon_path.replace('.TGA', '.png').replace('.tga', '.png'))
+            if image.isNull():
+                print(f"Failed to load both TGA and PNG for: {icon_path}")
+                image = None
+            else:
+                image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            self.sources[icon_path] = image
+        return self.sources[icon_path]
+
+    @staticmethod
+    def _render(image, tint, device_pixel_ratio):
+        size = round(ICON_SIZE * device_pixel_ratio)
+        target = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+        target.fill(Qt.transparent)
+        rect = QRectF(0, 0, size, size)
+        painter = QPainter(target)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(rect, image)
+            if tint is not None:
+                overlay = image.copy()
+                overlay_painter = QPainter(overlay)
+                overlay_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
+                color = QColor(tint)
+                color.setAlpha(TINT_ALPHA)
+                overlay_painter.fillRect(overlay.rect(), color)
+                overlay_painter.end()
+                painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
+                painter.drawImage(rect, overlay)
+        finally:
+            painter.end()
+        pixmap = QPixmap.fromImage(target)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
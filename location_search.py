@@ -0,0 +1,137 @@
+import re
+import unicodedata
+from typing import NamedTuple
+
+class Location(NamedTuple):
+    name: str  # Label text as shown on the map
+    map_name: str  # API map name
+    x: float  # Position in the hex's 0-1 coordinates
+    y: float
+    major: bool
+
+def normalise(text):
+    """Return the lower-case, accent-free form of a name that searches match against"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.findall(r"[a-z0-9]+", text.lower()))
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}  # char -> _TrieNode
+        self.ids = []  # Ids of every location with a key through this node, best ranked first
+
+class LocationIndex:
+    """
+    Prefix and typo-tolerant search over the location labels of every hex
+
+    Each label is inserted into a trie once per word, so "blemish" finds
+    "The Blemish". Every trie node keeps the ids of all locations below it
+    in rank order (major locations, then shorter names), so a prefix lookup
+    is a walk of len(query) nodes plus a slice. When the prefix matches too
+    few locations, a Levenshtein walk over the same trie adds those within
+    a small edit distance of the query. The walk is far slower than the
+    prefix lookup (about 1-2 ms for a few thousand labels), so callers
+    searching on every keystroke pass fuzzy=False and add misspellings once
+    typing pauses.
+    """
+
+    def __init__(self, locations=()):
+        self.locations = sorted(locations, key=lambda location: (not location.major, len(location.name), location.name, location.map_name))
+        self.root = _TrieNode()
+        for location_id, location in enumerate(self.locations):
+            words = normalise(location.name).split(' ')
+            for start in range(len(words)):
+                self._insert(' '.join(words[start:]), location_id)
+
+    @classmethod
+    def from_static_data(cls, maps):
+        """Build an index from {map_name: StaticMapData}"""
+        return cls(
+            Location(text_item.text, map_name, text_item.x, text_item.y, text_item.marker_type == 'Major')
+            for map_name, static_data in maps.items() if static_data is not None
+            for text_item in static_data.text_items if text_item.text
+        )
+
+    def _insert(self, key, location_id):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            # Ids arrive in rank order, so checking the last one is enough to avoid duplicates
+            if not node.ids or node.ids[-1] != location_id:
+                node.ids.append(location_id)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def search(self, query, limit=10, fuzzy=True):
+        """
+        Find locations whose name, or any word of it onwards, starts with the query
+
+        Args:
+            query: Text typed so far
+            limit: Maximum number of results
+            fuzzy: Add close misspellings when there are fewer than limit prefix matches
+
+        Returns:
+            List of Location, prefix matches first, then close misspellings
+        """
+        key = normalise(query)
+        if not key:
+            return []
+
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                break
+        found = node.ids[:limit] if node is not None else []
+        if fuzzy and len(found) < limit:
+            seen = set(found)
+            for _, location_id in sorted(self._fuzzy(key, self._max_distance(key))):
+                if location_id not in seen:
+                    seen.add(location_id)
+                    found.append(location_id)
+                    if len(found) == limit:
+                        break
+        return [self.locations[location_id] for location_id in found]
+
+    @staticmethod
+    def _max_distance(key):
+        if len(key) < 4:
+            return 0
+        return 1 if len(key) < 8 else 2
+
+    def _fuzzy(self, key, max_distance):
+        """Return [(distance, id)] of the locations with a key prefix within max_distance edits of key"""
+        if max_distance == 0:
+            return []
+        best = {}  # location id -> smallest distance
+        # Only cells within max_distance of the diagonal can stay within max_distance;
+        # every other cell is left at max_distance + 1, which is all the walk needs to know
+        beyond = max_distance + 1
+        first_row = [min(column, beyond) for column in range(len(key) + 1)]
+        stack = [(child, char, 1, first_row) for char, child in self.root.children.items()]
+        while stack:
+            node, char, depth, previous = stack.pop()
+            row = [beyond] * (len(key) + 1)
+            row[0] = min(depth, beyond)
+            for column in range(max(1, depth - max_distance), min(len(key), depth + max_distance) + 1):
+                row[column] = min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (key[column - 1] != char),
+                    beyond
+                )
+            lowest = min(row)
+            if row[-1] <= max_distance:
+                # This node's prefix matches the whole query, and so does every key below it
+                for location_id in node.ids:
+                    if row[-1] < best.get(location_id, max_distance + 1):
+                        best[location_id] = row[-1]
+                if row[-1] == lowest:
+                    continue  # No row below can drop under this row's minimum, so no key below matches closer
+            if lowest <= max_distance:
+                stack.extend((child, child_char, depth + 1, row) for child_char, child in node.children.items())
+        return [(distance, location_id) for location_id, distance in best.items()]
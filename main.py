@@ -1,15 +1,28 @@
 import sys
 import json
 import logging
+import time
+from collections import Counter
+from functools import partial
 from datetime import datetime
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-																											QComboBox, QPushButton, QLabel, QScrollArea, QSplitter, QToolTip, QTextEdit, QGroupBox, QHBoxLayout, QListWidget)
-from PySide6.QtCore import QTimer, Qt, QRectF, QPointF
-from PySide6.QtGui import QPainter, QColor, QFont, QPen, QBrush, QWheelEvent, QMouseEvent, QImage
-from api_client import FoxholeAPI
-from map_icons import IconType, TeamID, ICON_COLORS, ICON_SYMBOLS, STRUCTURE_RANGES, ICON_PATHS, TEAM_COLORED_STRUCTURES, ORANGE_COLORED_STRUCTURES, YELLOW_COLORED_STRUCTURES, GREY_COLORED_STRUCTURES, BRIGHT_ORANGE_COLORED_STRUCTURES, STRUCTURE_COLORS
+																											QComboBox, QPushButton, QLabel, QScrollArea, QSplitter, QToolTip, QTextEdit, QGroupBox, QHBoxLayout, QListWidget, QSlider, QMenu, QLineEdit, QCompleter)
+from PySide6.QtCore import QTimer, Qt, QRectF, QPointF, QEvent, QStringListModel, QThreadPool, Signal
+from PySide6.QtGui import QPainter, QColor, QFont, QPen, QBrush, QWheelEvent, QMouseEvent, QPixmap
+from api_client import DEFAULT_SHARD, SHARDS
+from fetch_service import FetchService
+from snapshot_store import HexSnapshot, SnapshotStore
+from refresh_scheduler import RefreshScheduler
+from war_models import FLAG_DAMAGED, FLAG_DESTROYED, TEAM_NAMES
+from snapshot_diff import diff_snapshots, find_item
+from world_aggregates import WorldAggregates
+from map_query import CATEGORIES, Query
+from spatial_index import ProximityIndex, ScreenHash, SpatialGrid, structure_range
+from icon_atlas import ICON_SIZE, IconAtlas
+from map_tiles import MapPyramid, TileCache, find_map_image
+from request_policy import CircuitBreaker
+from map_icons import IconType, TeamID, ICON_VISIBILITY_SETTINGS, ICON_COLORS, ICON_SYMBOLS, STRUCTURE_RANGES
 import numpy as np
-import os
 import traceback
 
 # Configure logging
@@ -23,14 +36,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Display name of every icon type
+STRUCTURE_NAMES = {icon_type.value: icon_type.name.replace('_', ' ').title() for icon_type in IconType}
+
 class MapView(QWidget):
-    def __init__(self, visibility_settings=None, parent=None):
+    pyramid_built = Signal(object, bool)  # (MapPyramid, success), emitted from the building worker thread
+
+    # Right-click proximity targets: (label, icon types)
+    PROXIMITY_TARGETS = (
+        ("Hospital", [IconType.HOSPITAL]),
+        ("Seaport", [IconType.SEAPORT]),
+        ("Storage Depot", [IconType.STORAGE_FACILITY]),
+    )
+
+    def __init__(self, visibility_settings=None, proximity_index=None, parent=None):
         super().__init__(parent)
-        self.api = FoxholeAPI()  # Initialize the API client
         self.visibility_settings = visibility_settings
-        self.map_data = None
-        self.static_map_data = None  # Store static map data
-        self.map_image = None
+        self.proximity_index = proximity_index  # ProximityIndex for right-click queries
+        self.proximity_marker = None  # (x, y, target_x, target_y) of the last nearest-structure answer, in hex coordinates
+        self.focus_target = None  # (map_name, x, y) to centre on once that hex is shown
+        self.snapshot = None  # HexSnapshot being displayed; replaced, never modified
+        self.icon_atlas = IconAtlas()  # Decoded, pre-tinted icons
+        self.icon_atlas.preload(self.devicePixelRatioF())
+        self.icon_layer = None  # (key, QPixmap, pan_x, pan_y) of the last pre-rendered icons
+        self.item_grid = None  # (DynamicMapData, SpatialGrid) for culling icons to the view
+        self.label_grid = None  # (StaticMapData, SpatialGrid) for culling labels to the view
+        self.hit_index = None  # (key, ScreenHash) of the visible items at the current pan and zoom
+        self.tooltips = None  # (DynamicMapData, {item index: tooltip HTML})
+        self.map_pyramid = None  # MapPyramid of the current hex's background, once its tiles exist
+        self.map_size = None  # (width, height) of the current hex's background image
+        self.pyramid_builds = set()  # Hexes whose tiles are being built
+        self.tile_cache = TileCache()
+        self.pyramid_built.connect(self.on_pyramid_built)
         self.current_map = None
         self.selected_structure = None  # Store selected structure for range display
         self.scale = 1.0
@@ -46,49 +83,155 @@ class MapView(QWidget):
         # Initialize view transformation
 
 
-    def set_map_data(self, data, map_name):
-        self.map_data = data
-        if self.current_map != map_name:
-            self.current_map = map_name
-            self.load_map_image(map_name)
-            self.selected_structure = None
-            # Always fetch static data when map changes, ETags will handle caching
-            self.static_map_data = self.api.get_static_map_data(map_name)
+    # Above this many changed items a single full repaint is cheaper than many small ones
+    MAX_DIRTY_ITEMS = 64
+    # Minimum zoom when jumping to a searched location
+    FOCUS_SCALE = 2.5
+    # Pixels of icons pre-rendered beyond each edge of the view, i.e. how far it can pan before they are redrawn
+    ICON_LAYER_MARGIN = 256
+    # Pixels beyond the view within which a label's anchor may lie and its text still show
+    LABEL_MARGIN = 200
+    # Pixels from an icon's centre within which hovering or clicking hits it
+    HIT_RADIUS = 15
+
+    @property
+    def map_data(self):
+        return self.snapshot.dynamic if self.snapshot is not None else None
+
+    @property
+    def static_map_data(self):
+        return self.snapshot.static if self.snapshot else None
+
+    def set_snapshot(self, snapshot):
+        """
+        Display a hex snapshot from the snapshot store
+
+        For a new snapshot of the map already shown, only the screen regions
+        of added, removed and changed icons are repainted.
+
+        Returns:
+            True if anything visible changed
+        """
+        old_snapshot = self.snapshot
+        self.snapshot = snapshot
+        map_name = snapshot.map_name
+
+        if self.current_map != map_name or old_snapshot is None or old_snapshot.dynamic is None:
+            if self.current_map != map_name:
+                self.current_map = map_name
+                self.load_map_image(map_name)
+                self.selected_structure = None
+                self.proximity_marker = None
+                if self.focus_target and self.focus_target[0] == map_name:
+                    self._apply_focus()
+            self.update()
+            return True
+
+        static_changed = snapshot.static is not old_snapshot.static
+        old_data = old_snapshot.dynamic
+        data = snapshot.dynamic
+        if data is old_data or (data.version is not None and data.version == old_data.version):
+            if static_changed:
+                self.update()
+            return static_changed
+
+        diff = diff_snapshots(old_data, data)
+        if not diff:
+            if static_changed:
+                self.update()
+            return static_changed
+
+        selection_moved = False
+        if self.selected_structure:
+            index = find_item(data, self.selected_structure)
+            selected = data.item(index) if index is not None else None
+            selection_moved = selected != self.selected_structure
+            self.selected_structure = selected
+
+        if static_changed or selection_moved or len(diff) > self.MAX_DIRTY_ITEMS:
+            self.update()
+        else:
+            self._update_items(old_data, np.concatenate([diff.removed, diff.changed_old]))
+            self._update_items(data, np.concatenate([diff.added, diff.changed]))
+        return True
+
+    def clear_snapshot(self):
+        """Forget the current snapshot so the next set_snapshot repaints everything"""
+        self.snapshot = None
+        self.selected_structure = None
+        self.proximity_marker = None
         self.update()
 
+    def focus_on(self, map_name, x, y):
+        """Centre and zoom on a point of a hex, now if it is shown or else as soon as it is"""
+        self.focus_target = (map_name, x, y)
+        if map_name == self.current_map:
+            self._apply_focus()
+            self.update()
+
+    def _apply_focus(self):
+        _, x, y = self.focus_target
+        self.focus_target = None
+        self.scale = min(max(self.scale, self.FOCUS_SCALE), self.max_scale)
+        base_rect = self.get_base_rect()
+        self.pan_x = self.width() / 2 - (base_rect.left() + x * base_rect.width()) * self.scale
+        self.pan_y = self.height() / 2 - (base_rect.top() + y * base_rect.height()) * self.scale
+
+    def _update_items(self, data, indices, margin=2):
+        """Schedule a repaint of the icon areas of the given items of data"""
+        if not len(indices):
+            return
+        base_rect = self.get_base_rect()
+        screen_x = (base_rect.left() + data.x[indices] * base_rect.width()) * self.scale + self.pan_x
+        screen_y = (base_rect.top() + data.y[indices] * base_rect.height()) * self.scale + self.pan_y
+        half = 16 + margin  # Icons are 32x32 and centred on their position
+        for x, y in zip(screen_x.tolist(), screen_y.tolist()):
+            self.update(QRectF(x - half, y - half, 2 * half, 2 * half).toAlignedRect())
+
     def load_map_image(self, map_name):
-        """Load the map background image from WebP, PNG, or TGA"""
-        # Special case for ClahstraHex
-        if map_name == "ClahstraHex":
-            map_path = os.path.join("maps", "MapClahstraHexMap.TGA")
-            if os.path.exists(map_path):
-                self.map_image = QImage(map_path)
-                if not self.map_image.isNull():
-                    self.map_image = self.map_image.scaled(
-                        self.map_image.width() * 3,
-                        self.map_image.height() * 3,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    return
-
-        # Try each format in order of preference
-        for ext in ['.webp', '.png', '.tga']:
-            map_path = os.path.join("maps", f"Map{map_name}{ext}")
-            if os.path.exists(map_path):
-                self.map_image = QImage(map_path)
-                if not self.map_image.isNull():
-                    # Set high-quality image scaling with 3x resolution
-                    self.map_image = self.map_image.scaled(
-                        self.map_image.width() * 3,  # Triple the resolution
-                        self.map_image.height() * 3,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    return
-        
-        print(f"Warning: Map image not found for {map_name} (tried .webp, .png, and .tga)")
-        self.map_image = None
+        """Open the tiled background of a hex, building its tiles in the background the first time"""
+        self.map_pyramid = None
+        self.map_size = None
+        source_path = find_map_image(map_name)
+        if source_path is None:
+            print(f"Warning: Map image not found for {map_name} (tried .webp, .png, and .tga)")
+            return
+        pyramid = MapPyramid(map_name, source_path)
+        self.map_size = (pyramid.width, pyramid.height)
+        if pyramid.load():
+            self.map_pyramid = pyramid
+        elif map_name not in self.pyramid_builds:
+            # The grid is shown until the tiles are written; decoding happens off the GUI thread
+            self.pyramid_builds.add(map_name)
+            QThreadPool.globalInstance().start(lambda: self.pyramid_built.emit(pyramid, pyramid.build()))
+
+    def on_pyramid_built(self, pyramid, success):
+        self.pyramid_builds.discard(pyramid.map_name)
+        self.tile_cache.discard(pyramid.map_name)
+        if success and pyramid.map_name == self.current_map:
+            self.map_pyramid = pyramid
+            self.map_size = (pyramid.width, pyramid.height)
+            self.update()
+
+    def _draw_map_tiles(self, painter, base_rect):
+        """Draw the background tiles of the level matching the zoom that overlap the view (scene transform applied)"""
+        pyramid = self.map_pyramid
+        level = pyramid.level_for(base_rect.width() * self.scale * self.devicePixelRatioF())
+        painter.save()
+        try:
+            # Antialiased edges would leave hairline seams between neighbouring tiles
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            for column, row, (left, top, right, bottom) in pyramid.tiles_in(level, *self.view_rect(base_rect)):
+                image = self.tile_cache.get(pyramid, level, column, row)
+                if image is not None:
+                    painter.drawImage(QRectF(
+                        base_rect.left() + left * base_rect.width(),
+                        base_rect.top() + top * base_rect.height(),
+                        (right - left) * base_rect.width(),
+                        (bottom - top) * base_rect.height()
+                    ), image)
+        finally:
+            painter.restore()
 
     def wheelEvent(self, event: QWheelEvent):
         # Get the position before zoom
@@ -114,33 +257,79 @@ class MapView(QWidget):
             # Store position for panning
             self.last_mouse_pos = event.position()
             
+            if self.proximity_marker:
+                self.proximity_marker = None
+                self.update()
+
             # Check if we clicked on a structure with range
-            if self.map_data and 'mapItems' in self.map_data:
-                base_rect = self.get_base_rect()
-                
-                for item in self.map_data['mapItems']:
-                    # Skip if item is not visible according to settings
-                    if not self.should_draw_item(item):
-                        continue
-                        
-                    if item['iconType'] in STRUCTURE_RANGES:
-                        # Calculate item position
-                        x = base_rect.left() + item['x'] * base_rect.width()
-                        y = base_rect.top() + item['y'] * base_rect.height()
-                        screen_x = x * self.scale + self.pan_x
-                        screen_y = y * self.scale + self.pan_y
-                        
-                        # Check if click is within icon bounds
-                        dx = event.position().x() - screen_x
-                        dy = event.position().y() - screen_y
-                        if (dx * dx + dy * dy) < 225:  # 15*15 radius
-                            # Toggle selection
-                            if self.selected_structure == item:
-                                self.selected_structure = None
-                            else:
-                                self.selected_structure = item
-                            self.update()
-                            return
+            if self.map_data is not None:
+                with_range = Query({}).where(icon_types=STRUCTURE_RANGES).mask(self.current_map, self.map_data)
+                index = self.item_at(event.position(), with_range)
+                if index is not None:
+                    item = self.map_data.item(index)
+                    # Toggle selection
+                    if self.selected_structure == item:
+                        self.selected_structure = None
+                    else:
+                        self.selected_structure = item
+                    self.update()
+
+    def screen_to_hex(self, pos):
+        """Convert a screen position to the current hex's 0-1 coordinates"""
+        base_rect = self.get_base_rect()
+        x = ((pos.x() - self.pan_x) / self.scale - base_rect.left()) / base_rect.width()
+        y = ((pos.y() - self.pan_y) / self.scale - base_rect.top()) / base_rect.height()
+        return x, y
+
+    def contextMenuEvent(self, event):
+        """Offer nearest-structure and coverage queries for the point under the cursor"""
+        if self.map_data is None or self.proximity_index is None:
+            return
+        x, y = self.screen_to_hex(event.pos())
+        if not (0 <= x <= 1 and 0 <= y <= 1):
+            return
+
+        menu = QMenu(self)
+        for team, team_name in ((TeamID.WARDENS.value, "Warden"), (TeamID.COLONIALS.value, "Colonial")):
+            for label, icon_types in self.PROXIMITY_TARGETS:
+                action = menu.addAction(f"Nearest {team_name} {label}")
+                action.triggered.connect(partial(self.show_nearest, x, y, icon_types, team, f"{team_name} {label}"))
+            menu.addSeparator()
+        covering = menu.addAction("Structures Covering This Point")
+        covering.triggered.connect(partial(self.show_covering, x, y))
+        menu.exec(event.globalPos())
+
+    def show_nearest(self, x, y, icon_types, team, label):
+        """Mark the nearest matching structure, in this hex or across its borders, and report its distance"""
+        result = self.proximity_index.nearest_world(self.current_map, x, y, 1, icon_types, [team])
+        if not result:
+            self.proximity_marker = None
+            QToolTip.showText(self.cursor().pos(), f"No {label} found")
+        else:
+            map_name, item, distance = result[0]
+            # The target is placed in this hex's coordinates, beyond 0-1 if it is in another hex
+            layout = self.proximity_index.layout
+            if map_name == self.current_map or map_name not in layout:
+                target_x, target_y = item.x, item.y
+            else:
+                target_x, target_y = layout.to_local(self.current_map, *layout.to_world(map_name, item.x, item.y))
+            self.proximity_marker = (x, y, float(target_x), float(target_y))
+            where = "" if map_name == self.current_map else f" in {map_name.replace('Hex', '')}"
+            QToolTip.showText(self.cursor().pos(), f"Nearest {label}: {distance:.3f} hex widths away{where}")
+        self.update()
+
+    def show_covering(self, x, y):
+        """Report which ranged structures, including those in neighbouring hexes, cover a point, per team and type"""
+        covering = self.proximity_index.covering_world(self.current_map, x, y)
+        if not covering:
+            QToolTip.showText(self.cursor().pos(), "No structure ranges cover this point")
+            return
+        counts = Counter((item.team_id, item.icon_type) for _, item, _, _ in covering)
+        lines = [
+            f"{count} {team_id.title()} {IconType(icon_type).name.replace('_', ' ').title()}"
+            for (team_id, icon_type), count in sorted(counts.items())
+        ]
+        QToolTip.showText(self.cursor().pos(), "Covered by:\n" + "\n".join(lines))
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
@@ -155,50 +344,55 @@ class MapView(QWidget):
             self.last_mouse_pos = event.position()
             self.update()
         
-        # Handle tooltips
-        if self.map_data and 'mapItems' in self.map_data:
-            pos = event.position()
+        # Handle tooltips; not while dragging, when every move would invalidate the hit index
+        if self.map_data is not None and self.last_mouse_pos is None:
+            # Check if mouse is over any item (constant-size radius)
+            index = self.item_at(event.position())
+            if index is not None:
+                QToolTip.showText(event.globalPosition().toPoint(), self.tooltip_for(index))
+                return
+
+        QToolTip.hideText()
+
+    def screen_positions(self, base_rect):
+        """Return the screen x and y coordinates of every map item as arrays"""
+        screen_x = (base_rect.left() + self.map_data.x * base_rect.width()) * self.scale + self.pan_x
+        screen_y = (base_rect.top() + self.map_data.y * base_rect.height()) * self.scale + self.pan_y
+        return screen_x, screen_y
+
+    def item_at(self, pos, mask=None):
+        """Return the index of the first visible item (optionally also in mask) within HIT_RADIUS pixels of pos, or None"""
+        return self._hit_index().hit(pos.x(), pos.y(), mask)
+
+    def _hit_index(self):
+        """Return the screen-space hash of the visible items on screen, rebuilt only when the view changed"""
+        key = (self.map_data, self._hidden_categories(), self.scale, self.pan_x, self.pan_y, self.width(), self.height())
+        if self.hit_index is None or self.hit_index[0] != key:
             base_rect = self.get_base_rect()
-            
-            # Check if mouse is over any item
-            for item in self.map_data['mapItems']:
-                # Skip if item is not visible according to settings
-                if not self.should_draw_item(item):
-                    continue
-                    
-                # Calculate scaled position
-                x = base_rect.left() + item['x'] * base_rect.width()
-                y = base_rect.top() + item['y'] * base_rect.height()
-                
-                # Apply pan and zoom to position
-                screen_x = x * self.scale + self.pan_x
-                screen_y = y * self.scale + self.pan_y
-                
-                # Calculate distance to item center
-                dx = pos.x() - screen_x
-                dy = pos.y() - screen_y
-                distance = (dx * dx + dy * dy) ** 0.5
-                
-                # If mouse is within item radius (constant size)
-                if distance < 15:
-                    tooltip = self.create_tooltip(item)
-                    QToolTip.showText(event.globalPosition().toPoint(), tooltip)
-                    return
-            
-            QToolTip.hideText()
+            indices = self._item_grid().in_rect(*self.view_rect(base_rect, self.HIT_RADIUS))
+            indices = indices[self.visible_mask()[indices]]
+            screen_x = (base_rect.left() + self.map_data.x[indices] * base_rect.width()) * self.scale + self.pan_x
+            screen_y = (base_rect.top() + self.map_data.y[indices] * base_rect.height()) * self.scale + self.pan_y
+            self.hit_index = (key, ScreenHash(screen_x, screen_y, indices, self.HIT_RADIUS))
+        return self.hit_index[1]
+
+    def tooltip_for(self, index):
+        """Return the tooltip of a displayed item, created once per snapshot"""
+        if self.tooltips is None or self.tooltips[0] is not self.map_data:
+            self.tooltips = (self.map_data, {})
+        cache = self.tooltips[1]
+        if index not in cache:
+            cache[index] = self.create_tooltip(self.map_data.item(index))
+        return cache[index]
 
     def create_tooltip(self, item):
         """Create a tooltip for a map item"""
-        icon_type = item['iconType']
-        team = item['teamId']
-        flags = item['flags']
+        icon_type = item.icon_type
+        team = item.team_id
+        flags = item.flags
         
         # Get the structure name from the icon type
-        structure_name = "Unknown Structure"
-        for icon_enum in IconType:
-            if icon_enum.value == icon_type:
-                structure_name = icon_enum.name.replace('_', ' ').title()
-                break
+        structure_name = STRUCTURE_NAMES.get(icon_type, "Unknown Structure")
         
         # Get team name and color
         team_name = "Neutral"
@@ -224,7 +418,7 @@ class MapView(QWidget):
         <div style='background-color: white; padding: 4px 8px; border-radius: 4px;'>
             <b style='color: #333;'>{structure_name}</b><br>
             <span style='color: {team_color};'>{team_name}</span><br>
-            <span style='color: #666; font-size: 90%;'>{item['x']:.1f}, {item['y']:.1f}</span>
+            <span style='color: #666; font-size: 90%;'>{item.x:.1f}, {item.y:.1f}</span>
         </div>
         """
         return tooltip.strip()
@@ -247,8 +441,8 @@ class MapView(QWidget):
         margin = 50
         base_rect = QRectF(margin, margin, view_size - 2*margin, view_size - 2*margin)
         
-        if self.map_image:
-            img_aspect = self.map_image.width() / self.map_image.height()
+        if self.map_size:
+            img_aspect = self.map_size[0] / self.map_size[1]
             scaled_rect = QRectF(base_rect)
             
             if img_aspect > 1:  # Image is wider than tall
@@ -265,7 +459,7 @@ class MapView(QWidget):
         return base_rect
 
     def paintEvent(self, event):
-        if not self.map_data:
+        if self.map_data is None:
             return
 
         painter = QPainter(self)
@@ -284,19 +478,19 @@ class MapView(QWidget):
                 painter.translate(self.pan_x, self.pan_y)
                 painter.scale(self.scale, self.scale)
                 
-                if self.map_image:
-                    painter.drawImage(base_rect, self.map_image)
+                if self.map_pyramid:
+                    self._draw_map_tiles(painter, base_rect)
                 else:
                     self._draw_grid(painter, base_rect)
 
-                # Draw range circle for selected structure
-                if self.selected_structure:
-                    x = base_rect.left() + self.selected_structure['x'] * base_rect.width()
-                    y = base_rect.top() + self.selected_structure['y'] * base_rect.height()
+                # Draw range circle for selected structure, unless it lies entirely off-screen
+                if self.selected_structure and self._range_in_view(base_rect):
+                    x = base_rect.left() + self.selected_structure.x * base_rect.width()
+                    y = base_rect.top() + self.selected_structure.y * base_rect.height()
                     
                     # Get range and team color
-                    structure_range = STRUCTURE_RANGES[self.selected_structure['iconType']]
-                    team_id = TeamID(self.selected_structure['teamId'])
+                    structure_range = STRUCTURE_RANGES[self.selected_structure.icon_type]
+                    team_id = TeamID(self.selected_structure.team_id)
                     team_color = QColor(ICON_COLORS.get(team_id, "#808080"))
                     
                     if isinstance(structure_range, dict):  # Coastal gun with inner/outer ranges
@@ -328,21 +522,26 @@ class MapView(QWidget):
             # Draw items at constant size
             painter.save()
             try:
-                if 'mapItems' in self.map_data:
-                    for item in self.map_data['mapItems']:
-                        # Check visibility settings based on icon type
-                        if not self.should_draw_item(item):
-                            continue
+                # Icons come from a cached layer; between rebuilds, panning only moves where it is drawn
+                layer, layer_pan_x, layer_pan_y = self._icon_layer(base_rect)
+                margin = self.ICON_LAYER_MARGIN
+                painter.drawPixmap(QPointF(self.pan_x - layer_pan_x - margin, self.pan_y - layer_pan_y - margin), layer)
 
-                        # Calculate scaled position using the aspect-ratio corrected base_rect
-                        x = base_rect.left() + item['x'] * base_rect.width()
-                        y = base_rect.top() + item['y'] * base_rect.height()
-                        
-                        # Apply pan and zoom to position only
-                        screen_x = x * self.scale + self.pan_x
-                        screen_y = y * self.scale + self.pan_y
-                        
-                        self._draw_map_item(painter, item, screen_x, screen_y)
+                # Line from a right-clicked point to the nearest structure found for it
+                if self.proximity_marker:
+                    point_x, point_y, target_x, target_y = self.proximity_marker
+                    start = QPointF(
+                        (base_rect.left() + point_x * base_rect.width()) * self.scale + self.pan_x,
+                        (base_rect.top() + point_y * base_rect.height()) * self.scale + self.pan_y
+                    )
+                    end = QPointF(
+                        (base_rect.left() + target_x * base_rect.width()) * self.scale + self.pan_x,
+                        (base_rect.top() + target_y * base_rect.height()) * self.scale + self.pan_y
+                    )
+                    painter.setPen(QPen(QColor(255, 215, 0), 2, Qt.DashLine))
+                    painter.setBrush(Qt.NoBrush)
+                    painter.drawLine(start, end)
+                    painter.drawEllipse(end, 20, 20)
             finally:
                 painter.restore()
 
@@ -352,7 +551,7 @@ class MapView(QWidget):
                 painter.translate(self.pan_x, self.pan_y)
                 painter.scale(self.scale, self.scale)
 
-                if self.static_map_data and 'mapTextItems' in self.static_map_data:
+                if self.static_map_data:
                     # Save current transform and reset scale for text
                     painter.save()
                     painter.scale(1/self.scale, 1/self.scale)  # Counter the scale for text
@@ -367,37 +566,39 @@ class MapView(QWidget):
                     minor_font = QFont(font)
                     minor_font.setPointSize(10)
                     
-                    for text_item in self.static_map_data['mapTextItems']:
+                    text_items = self.static_map_data.text_items
+                    for index in self._label_grid().in_rect(*self.view_rect(base_rect, self.LABEL_MARGIN)).tolist():
+                        text_item = text_items[index]
                         # Check visibility settings for text
                         if not self.should_draw_text(text_item):
                             continue
 
                         # Calculate position in scaled coordinates
-                        map_x = base_rect.left() + text_item['x'] * base_rect.width()
-                        map_y = base_rect.top() + text_item['y'] * base_rect.height()
+                        map_x = base_rect.left() + text_item.x * base_rect.width()
+                        map_y = base_rect.top() + text_item.y * base_rect.height()
                         
                         # Convert to screen coordinates
                         screen_x = map_x * self.scale
                         screen_y = map_y * self.scale
                         
                         # Set font based on marker type
-                        if text_item['mapMarkerType'] == 'Major':
+                        if text_item.marker_type == 'Major':
                             painter.setFont(major_font)
                         else:
                             painter.setFont(minor_font)
                         
                         # Draw text with shadow for better visibility
-                        text_rect = painter.fontMetrics().boundingRect(text_item['text'])
+                        text_rect = painter.fontMetrics().boundingRect(text_item.text)
                         text_x = screen_x - text_rect.width() / 2
                         text_y = screen_y + text_rect.height() / 2
                         
                         # Draw shadow
                         painter.setPen(Qt.black)
-                        painter.drawText(text_x + 1, text_y + 1, text_item['text'])
+                        painter.drawText(text_x + 1, text_y + 1, text_item.text)
                         
                         # Draw text
                         painter.setPen(Qt.white)
-                        painter.drawText(text_x, text_y, text_item['text'])
+                        painter.drawText(text_x, text_y, text_item.text)
                     
                     # Restore transform for other elements
                     painter.restore()
@@ -411,48 +612,28 @@ class MapView(QWidget):
         if not self.visibility_settings:
             return True
             
-        icon_type = item['iconType']
-        
-        # Core structures
-        if icon_type in [IconType.TOWN_BASE_1.value, IconType.TOWN_BASE_2.value, IconType.TOWN_BASE_3.value]:
-            return self.visibility_settings.get_visibility_state('town_bases')
-        elif icon_type == IconType.GARRISON_STATION.value:
-            return self.visibility_settings.get_visibility_state('safe_houses')
-        elif icon_type in [IconType.RELIC_BASE_1.value, IconType.RELIC_BASE_2.value, IconType.RELIC_BASE_3.value]:
-            return self.visibility_settings.get_visibility_state('relic_bases')
-        elif icon_type == IconType.OBSERVATION_TOWER.value:
-            return self.visibility_settings.get_visibility_state('observation_towers')
-        elif icon_type == IconType.COASTAL_GUN.value:
-            return self.visibility_settings.get_visibility_state('coastal_guns')
-        elif icon_type == IconType.HOSPITAL.value:
-            return self.visibility_settings.get_visibility_state('other')
-        
-        # Industry
-        elif icon_type in [IconType.FACTORY.value, IconType.MASS_PRODUCTION_FACTORY.value, 
-                         IconType.REFINERY.value, IconType.CONSTRUCTION_YARD.value,
-                         IconType.VEHICLE_FACTORY.value, IconType.TECH_CENTER.value, IconType.MORTAR_HOUSE.value]:
-            return self.visibility_settings.get_visibility_state('industry')
-        elif icon_type in [IconType.SEAPORT.value, IconType.SHIPYARD.value, IconType.STORAGE_FACILITY.value,]:
-            return self.visibility_settings.get_visibility_state('storage')
-        
-        # Resources
-        elif icon_type in [IconType.COMPONENT_MINE.value, IconType.COMPONENT_FIELD.value]:
-            return self.visibility_settings.get_visibility_state('components')
-        elif icon_type in [IconType.SULFUR_MINE.value, IconType.SULFUR_FIELD.value]:
-            return self.visibility_settings.get_visibility_state('sulfur')
-        elif icon_type in [IconType.SALVAGE_MINE.value, IconType.SALVAGE_FIELD.value]:
-            return self.visibility_settings.get_visibility_state('salvage')
-        elif icon_type in [IconType.COAL_FIELD.value, IconType.OIL_FIELD.value, IconType.FACILITY_MINE_OIL_RIG.value]:
-            return self.visibility_settings.get_visibility_state('coal-oil')
-        
-        return True  # Show by default if not categorized
+        setting_name = ICON_VISIBILITY_SETTINGS.get(item.icon_type)
+        if setting_name is None:
+            return True  # Show by default if not categorized
+        return self.visibility_settings.get_visibility_state(setting_name)
+
+    def visible_query(self, query):
+        """Restrict a query to the item categories the visibility settings allow"""
+        if not self.visibility_settings:
+            return query
+        hidden = [category for category in CATEGORIES if not self.visibility_settings.get_visibility_state(category)]
+        return query.where(exclude_categories=hidden)
+
+    def visible_mask(self):
+        """Boolean array marking the map items that the visibility settings allow"""
+        return self.visible_query(Query({})).mask(self.current_map, self.map_data)
 
     def should_draw_text(self, text_item):
         """Check if a text item should be drawn based on visibility settings"""
         if not self.visibility_settings:
             return True
             
-        if text_item['mapMarkerType'] == 'Major':
+        if text_item.marker_type == 'Major':
             return self.visibility_settings.get_visibility_state('major_locations')
         else:
             return self.visibility_settings.get_visibility_state('minor_locations')
@@ -472,111 +653,101 @@ class MapView(QWidget):
             painter.drawLine(int(x), int(rect.top()), int(x), int(rect.bottom()))
             painter.drawLine(int(rect.left()), int(y), int(rect.right()), int(y))
 
-    def _draw_map_item(self, painter: QPainter, item, x, y):
-        """Draw a map item at the specified screen coordinates."""
+    def view_rect(self, base_rect, margin=0):
+        """Return the (left, top, right, bottom) hex 0-1 coordinates of the view, extended by margin pixels"""
+        left = ((-margin - self.pan_x) / self.scale - base_rect.left()) / base_rect.width()
+        top = ((-margin - self.pan_y) / self.scale - base_rect.top()) / base_rect.height()
+        right = ((self.width() + margin - self.pan_x) / self.scale - base_rect.left()) / base_rect.width()
+        bottom = ((self.height() + margin - self.pan_y) / self.scale - base_rect.top()) / base_rect.height()
+        return left, top, right, bottom
+
+    def _range_in_view(self, base_rect):
+        """Return True if the selected structure's (outer) range circle overlaps the view"""
+        left, top, right, bottom = self.view_rect(base_rect)
+        radius_x = structure_range(self.selected_structure.icon_type)
+        radius_y = radius_x * base_rect.width() / base_rect.height()
+        x, y = self.selected_structure.x, self.selected_structure.y
+        return x + radius_x >= left and x - radius_x <= right and y + radius_y >= top and y - radius_y <= bottom
+
+    def _item_grid(self):
+        """Return the spatial grid of the displayed items, built once per snapshot"""
+        if self.item_grid is None or self.item_grid[0] is not self.map_data:
+            self.item_grid = (self.map_data, SpatialGrid(self.map_data.x, self.map_data.y))
+        return self.item_grid[1]
+
+    def _label_grid(self):
+        """Return the spatial grid of the displayed labels, built once per static data"""
+        if self.label_grid is None or self.label_grid[0] is not self.static_map_data:
+            text_items = self.static_map_data.text_items
+            self.label_grid = (self.static_map_data, SpatialGrid(
+                np.array([text_item.x for text_item in text_items], dtype=np.float64),
+                np.array([text_item.y for text_item in text_items], dtype=np.float64)
+            ))
+        return self.label_grid[1]
+
+    def _hidden_categories(self):
+        if not self.visibility_settings:
+            return ()
+        return tuple(category for category in CATEGORIES if not self.visibility_settings.get_visibility_state(category))
+
+    def _icon_layer(self, base_rect):
+        """
+        Return (layer, pan_x, pan_y): every visible icon near the view, pre-rendered at that pan
+
+        Icons are constant-size, so panning only translates them: the layer is
+        reused until the data, visibility, zoom or widget size changes, or the
+        view pans more than ICON_LAYER_MARGIN pixels away from where it was rendered.
+        """
+        key = (self.map_data, self._hidden_categories(), self.scale, self.width(), self.height(), self.devicePixelRatioF())
+        if self.icon_layer is not None:
+            layer_key, layer, layer_pan_x, layer_pan_y = self.icon_layer
+            if (layer_key == key and abs(self.pan_x - layer_pan_x) <= self.ICON_LAYER_MARGIN
+                    and abs(self.pan_y - layer_pan_y) <= self.ICON_LAYER_MARGIN):
+                return layer, layer_pan_x, layer_pan_y
+        layer = self._render_icon_layer(base_rect)
+        self.icon_layer = (key, layer, self.pan_x, self.pan_y)
+        return layer, self.pan_x, self.pan_y
+
+    def _render_icon_layer(self, base_rect):
+        """Draw the visible icons within ICON_LAYER_MARGIN of the view, one atlas pixmap per icon class"""
+        margin = self.ICON_LAYER_MARGIN
+        device_pixel_ratio = self.devicePixelRatioF()
+        layer = QPixmap(
+            round((self.width() + 2 * margin) * device_pixel_ratio),
+            round((self.height() + 2 * margin) * device_pixel_ratio)
+        )
+        layer.setDevicePixelRatio(device_pixel_ratio)
+        layer.fill(Qt.transparent)
+
+        # Only items near the view are considered; their positions come from one vectorised transform.
+        # The layer's origin is margin pixels above and left of the view
+        indices = self._item_grid().in_rect(*self.view_rect(base_rect, margin + ICON_SIZE))
+        indices = indices[self.visible_mask()[indices]]
+        screen_x = (base_rect.left() + self.map_data.x[indices] * base_rect.width()) * self.scale + self.pan_x + margin - ICON_SIZE / 2
+        screen_y = (base_rect.top() + self.map_data.y[indices] * base_rect.height()) * self.scale + self.pan_y + margin - ICON_SIZE / 2
+
+        # Group items by (icon type, team), keeping item order within each group
+        classes = (self.map_data.icon_type[indices].astype(np.int64) << 8) | self.map_data.team[indices].astype(np.int64)
+        order = np.argsort(classes, kind='stable')
+        indices, classes, screen_x, screen_y = indices[order], classes[order], screen_x[order], screen_y[order]
+        starts = np.flatnonzero(np.r_[True, classes[1:] != classes[:-1]]) if len(classes) else classes
+        ends = np.r_[starts[1:], len(classes)]
+
+        painter = QPainter(layer)
         try:
-            icon_type = IconType(item.get('iconType', -1))
-            team_id = TeamID(item.get('teamId', 'NONE'))
-            
-            # Get icon path
-            icon_path = ICON_PATHS.get(icon_type)
-            if icon_path:
-                # Try to load TGA first
-                image = QImage(icon_path)
-                if image.isNull():
-                    # If TGA fails, try PNG
-                    png_path = icon_path.replace('.TGA', '.png').replace('.tga', '.png')
-                    image = QImage(png_path)
-                    if image.isNull():
-                        print(f"Failed to load both TGA and PNG for: {icon_path}")
-                        return self._draw_emoji_fallback(painter, icon_type, x, y)
+            painter.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                first = indices[start]
+                icon_type = int(self.map_data.icon_type[first])
+                pixmap = self.icon_atlas.pixmap(icon_type, TEAM_NAMES[self.map_data.team[first]], device_pixel_ratio)
+                for x, y in zip(screen_x[start:end].tolist(), screen_y[start:end].tolist()):
+                    if pixmap is None:
+                        self._draw_emoji_fallback(painter, icon_type, x + ICON_SIZE / 2, y + ICON_SIZE / 2)
                     else:
-                        # Convert PNG to ARGB32 format if it's in indexed format
-                        if image.format() == QImage.Format.Format_Indexed8:
-                            image = image.convertToFormat(QImage.Format.Format_ARGB32)
-            
-                # Calculate icon size (32x32 pixels)
-                icon_size = 32
-                
-                # Center the icon at the target position
-                icon_rect = QRectF(x - icon_size/2, y - icon_size/2, icon_size, icon_size)
-                
-                # Apply team colors to appropriate structures
-                if icon_type in TEAM_COLORED_STRUCTURES and team_id != TeamID.NONE:
-                    # First draw the original image
-                    painter.drawImage(icon_rect, image)
-                    
-                    # Create darker color overlay
-                    colored_image = image.copy()
-                    img_painter = QPainter(colored_image)
-                    img_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
-                    team_color = QColor(ICON_COLORS.get(team_id, "#808080"))
-                    team_color.setAlpha(180)  # 70% opacity
-                    img_painter.fillRect(colored_image.rect(), team_color)
-                    img_painter.end()
-                    
-                    # Draw the colored overlay with multiply blend mode
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-                    painter.drawImage(icon_rect, colored_image)
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-                elif icon_type in ORANGE_COLORED_STRUCTURES:
-                    painter.drawImage(icon_rect, image)
-                    colored_image = image.copy()
-                    img_painter = QPainter(colored_image)
-                    img_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
-                    color = QColor(STRUCTURE_COLORS["ORANGE"])
-                    color.setAlpha(180)
-                    img_painter.fillRect(colored_image.rect(), color)
-                    img_painter.end()
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-                    painter.drawImage(icon_rect, colored_image)
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-                elif icon_type in BRIGHT_ORANGE_COLORED_STRUCTURES:
-                    painter.drawImage(icon_rect, image)
-                    colored_image = image.copy()
-                    img_painter = QPainter(colored_image)
-                    img_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
-                    color = QColor(STRUCTURE_COLORS["BRIGHT_ORANGE"])
-                    color.setAlpha(180)
-                    img_painter.fillRect(colored_image.rect(), color)
-                    img_painter.end()
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-                    painter.drawImage(icon_rect, colored_image)
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-                elif icon_type in YELLOW_COLORED_STRUCTURES:
-                    painter.drawImage(icon_rect, image)
-                    colored_image = image.copy()
-                    img_painter = QPainter(colored_image)
-                    img_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
-                    color = QColor(STRUCTURE_COLORS["YELLOW"])
-                    color.setAlpha(180)
-                    img_painter.fillRect(colored_image.rect(), color)
-                    img_painter.end()
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-                    painter.drawImage(icon_rect, colored_image)
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-                elif icon_type in GREY_COLORED_STRUCTURES:
-                    painter.drawImage(icon_rect, image)
-                    colored_image = image.copy()
-                    img_painter = QPainter(colored_image)
-                    img_painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
-                    color = QColor(STRUCTURE_COLORS["DARK_GREY"])
-                    color.setAlpha(180)
-                    img_painter.fillRect(colored_image.rect(), color)
-                    img_painter.end()
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Multiply)
-                    painter.drawImage(icon_rect, colored_image)
-                    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
-                else:
-                    # Draw the original image for other icons
-                    painter.drawImage(icon_rect, image)
-            else:
-                print(f"Icon path not found: {icon_path} for {icon_type.name} - Team: {team_id.name}")  # Debug logging
-                self._draw_emoji_fallback(painter, icon_type, x, y)
-                
-        except (ValueError, KeyError) as e:
-            print(f"Error drawing map item: {e}")
-            self._draw_emoji_fallback(painter, None, x, y)
+                        painter.drawPixmap(QPointF(x, y), pixmap)
+        finally:
+            painter.end()
+        return layer
 
     def _draw_emoji_fallback(self, painter, icon_type, x, y):
         symbol = ICON_SYMBOLS.get(icon_type, "❓")
@@ -645,14 +816,27 @@ class MapViewer(QMainWindow):
         "WeatheredExpanse",
         "Westgate"
     ]
+    CLOSE_TIMEOUT = 3.0  # Seconds closing the window waits for running requests
 
     def __init__(self):
         super().__init__()
-        self.api = FoxholeAPI()
+        # All network I/O runs on the fetch service's worker threads. Each shard
+        # has its own service (client, caches, worker pool) and refresh scheduler
+        self.fetch_services = {}
+        self.schedulers = {}
+        self.world_aggregates = {}
+        self.proximity_indexes = {}
+        self.sweep_timers = {}  # Every shard visited keeps sweeping on its own schedule, active or not
+        self.sweep_versions = {}  # Shard -> map versions of its latest sweep, for the scheduler
+        self.shard = DEFAULT_SHARD
+        self.fetch_service = self.get_fetch_service(self.shard)
+        self.api = self.fetch_service.api
         self.current_map = None
-        self.map_data = None
-        self.war_report = None
+        self.snapshot = None  # HexSnapshot of the selected map, taken from the shard's snapshot store
+        self.history_seq = None  # Timeline position shown by the scrubber; None while following live data
         self.map_casualties = {}  # Store casualties for each map
+        self.aggregates = self.get_world_aggregates(self.shard)  # Structure counts kept up to date per snapshot
+        self.proximity = self.get_proximity_index(self.shard)  # Spatial grids for nearest-structure queries
         self.war_reports_file = "war_reports.json"
         
         # Load previous war reports
@@ -668,22 +852,117 @@ class MapViewer(QMainWindow):
         self.visibility_settings = VisibilitySettings()
         self.visibility_settings.visibility_changed.connect(self.on_visibility_changed)
         
+        # Set up update timer for map data
+        # Both timers are single-shot and re-armed by the scheduler after each fetch
+        self.scheduler = self.get_scheduler(self.shard)
+        
+        self.update_timer = QTimer()
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.update_map_data)
+        
+        # Short debounce so scrolling through the map combo only fetches the final map
+        self.selection_timer = QTimer()
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(150)
+        self.selection_timer.timeout.connect(self.update_map_data)
+        
+        # Misspelling-tolerant location search is too slow for every keystroke, so it waits for typing to pause
+        self.location_search_timer = QTimer()
+        self.location_search_timer.setSingleShot(True)
+        self.location_search_timer.setInterval(250)
+        self.location_search_timer.timeout.connect(self.on_location_search_paused)
+        
         # Initialize UI before fetching any data
         self.init_ui()
         
         # Initial war reports update for red dots
         self.update_war_reports()
+
+    def get_fetch_service(self, shard):
+        """Return the fetch service for a shard, creating and connecting it on first use"""
+        if shard not in self.fetch_services:
+            service = FetchService(shard)
+            service.store.snapshots_changed.connect(self.on_snapshots_changed)
+            service.sweep_ready.connect(self.on_sweep_ready)
+            service.remote_reports_ready.connect(self.on_remote_reports_ready)
+            service.request_started.connect(self.on_fetch_state_changed)
+            service.request_finished.connect(self.on_fetch_finished)
+            service.request_failed.connect(self.on_fetch_failed)
+            service.request_cancelled.connect(self.on_fetch_state_changed)
+            self.fetch_services[shard] = service
+        return self.fetch_services[shard]
+
+    def get_scheduler(self, shard):
+        """Return the refresh scheduler for a shard, creating it on first use"""
+        if shard not in self.schedulers:
+            scheduler = RefreshScheduler()
+            scheduler.configure("sweep", 600, min_interval=300, max_interval=1200, hidden_interval=3600)
+            if self.schedulers:
+                scheduler.set_hidden(self.scheduler.hidden)
+            self.schedulers[shard] = scheduler
+        return self.schedulers[shard]
+
+    def get_sweep_timer(self, shard):
+        """Return the single-shot timer of a shard's next sweep, creating it on first use"""
+        if shard not in self.sweep_timers:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(partial(self.on_sweep_due, shard))
+            self.sweep_timers[shard] = timer
+        return self.sweep_timers[shard]
+
+    def get_world_aggregates(self, shard):
+        """Return the structure count aggregates for a shard, creating them on first use"""
+        if shard not in self.world_aggregates:
+            self.world_aggregates[shard] = WorldAggregates()
+        return self.world_aggregates[shard]
+
+    def get_proximity_index(self, shard):
+        """Return the nearest-structure index for a shard, creating it on first use"""
+        if shard not in self.proximity_indexes:
+            self.proximity_indexes[shard] = ProximityIndex()
+        return self.proximity_indexes[shard]
+
+    def sender_shard(self):
+        """Return the shard whose fetch service or store sent the signal being handled (the active one otherwise)"""
+        sender = self.sender()
+        if isinstance(sender, SnapshotStore):
+            sender = sender.parent()
+        return sender.shard if isinstance(sender, FetchService) else self.shard
+
+    def from_inactive_shard(self):
+        """Return True if the signal being handled came from another shard's fetch service or store"""
+        return self.sender_shard() != self.shard
+
+    def on_shard_selected(self, shard):
+        """Switch every view to another shard, showing its cached data straight away"""
+        if shard == self.shard:
+            return
+        # The shard left keeps sweeping in the background; only the selected map's polling stops
+        self.update_timer.stop()
+        self.fetch_service.select_map(None)
         
-        # Set up update timer for map data
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_map_data)
-        self.update_timer.start(30000)  # Update every 30 seconds     
-        
-        # Set up timer for war reports
-        self.war_reports_timer = QTimer()
-        self.war_reports_timer.timeout.connect(self.update_war_reports)
-        self.war_reports_timer.start(600000)  # Update every 10 minutes
+        self.shard = shard
+        self.fetch_service = self.get_fetch_service(shard)
+        self.fetch_service.reset_revalidation()
+        self.api = self.fetch_service.api
+        self.scheduler = self.get_scheduler(shard)
+        self.get_sweep_timer(shard).stop()
+        self.setWindowTitle(f'Foxhole Map Viewer - {shard}')
         
+        self.aggregates = self.get_world_aggregates(shard)
+        self.proximity = self.get_proximity_index(shard)
+        self.map_view.proximity_index = self.proximity
+        # Catch up with anything published before the shard's aggregates existed
+        self.apply_snapshots(self.fetch_service.store.snapshots())
+        self.update_control_labels()
+        self.update_map_combo()
+        self.snapshot = None
+        self.history_seq = None
+        self.map_view.clear_snapshot()
+        self.update_history_slider()
+        self.update_war_reports()
+        self.update_map_data()
 
     def get_api_map_name(self, map_name):
         """Convert map name to API format"""
@@ -704,6 +983,9 @@ class MapViewer(QMainWindow):
 
     def get_casualties_per_hour(self, map_name):
         """Calculate casualties per hour using last 6 entries from remote war_reports.json"""
+        if self.shard != DEFAULT_SHARD:
+            return (0, 0)
+            
         try:
             # Ensure we have enough reports (need at least 2 for comparison)
             if not self.previous_war_reports or len(self.previous_war_reports) < 2:
@@ -766,71 +1048,61 @@ class MapViewer(QMainWindow):
             return "🟡"  # Yellow dot for moderate activity
         return ""  # No dot for low activity
 
-    def count_structures(self, map_name):
-        """Count structures for each faction in a map"""
-        map_data = self.api.get_map_data(self.get_api_map_name(map_name))
-        if not map_data or 'mapItems' not in map_data:
-            return {'WARDENS': 0, 'COLONIALS': 0}
-            
-        counts = {'WARDENS': 0, 'COLONIALS': 0}
-        for item in map_data['mapItems']:
-            if item['teamId'] == 'WARDENS':
-                counts['WARDENS'] += 1
-            elif item['teamId'] == 'COLONIALS':
-                counts['COLONIALS'] += 1
-        return counts
-    
-    def count_all_structures(self):
-        """Count structures across all maps and calculate control percentages"""
-        total_warden = 0
-        total_colonial = 0
-        
-        for map_name in self.AVAILABLE_MAPS:
-            counts = self.count_structures(map_name)
-            total_warden += counts['WARDENS']
-            total_colonial += counts['COLONIALS']
-            
-        total_structures = total_warden + total_colonial
-        
-        if total_structures > 0:
-            warden_percent = (total_warden / total_structures) * 100
-            colonial_percent = (total_colonial / total_structures) * 100
-        else:
-            warden_percent = 0
-            colonial_percent = 0
-            
-        return {
-            'WARDENS': total_warden,
-            'COLONIALS': total_colonial,
-            'WARDEN_PERCENT': warden_percent,
-            'COLONIAL_PERCENT': colonial_percent
-        }
+    def update_control_labels(self):
+        """Show the world-wide control percentages from the structure aggregates"""
+        total_structure_counts = self.aggregates.summary()
+        self.map_control_percentage_label_colonial.setText(
+            f"Colonial Control: {total_structure_counts['COLONIAL_PERCENT']:.1f}% ({total_structure_counts['COLONIALS']:,} structures)"
+        )
+        self.map_control_percentage_label_warden.setText(
+            f"Warden Control: {total_structure_counts['WARDEN_PERCENT']:.1f}% ({total_structure_counts['WARDENS']:,} structures)"
+        )
 
     def update_war_reports(self):
-        """Fetch war reports from remote server and update the combo box with indicators and faction control colors"""
-        try:
-            import requests
-            response = requests.get('https://foxholemapviewerapi-shaneeexd.pythonanywhere.com')
-            if response.status_code == 200:
-                data = response.json()
-                if 'reports' in data:
-                    # Add all reports from the response
-                    for report in data['reports']:
-                        self.previous_war_reports.append(report)
-                    
-                    # Maintain 2-hour window (12 reports)
-                    if len(self.previous_war_reports) > 12:
-                        self.previous_war_reports = self.previous_war_reports[-12:]
-                    
-                    print(f"Successfully updated war reports. Now have {len(self.previous_war_reports)} reports.")
-                else:
-                    print("Invalid data format received from server - missing 'reports' key")
-            else:
-                print(f"Error fetching war reports: HTTP {response.status_code}")
-        except Exception as e:
-            print(f"Error updating war reports: {e}")
-            traceback.print_exc()
+        """Request the remote war reports and a structure sweep of every map in the background"""
+        # The remote CPH history only tracks the default shard
+        if self.shard == DEFAULT_SHARD:
+            self.fetch_service.fetch_remote_war_reports()
+        self.sweep_shard(self.shard)
+
+    def sweep_shard(self, shard):
+        """Request a structure sweep of every map of a shard, active or not"""
+        fetch_service = self.get_fetch_service(shard)
+        api_map_names = [self.get_api_map_name(map_name) for map_name in self.AVAILABLE_MAPS]
+        fetch_service.fetch_all_maps(api_map_names)
+        # Static data only changes with a new war, so this is usually a single request
+        fetch_service.refresh_static_data(api_map_names)
+
+    def on_sweep_due(self, shard):
+        """Run a shard's scheduled sweep, with the remote war reports if it is the one shown"""
+        if shard == self.shard:
+            self.update_war_reports()
+        else:
+            self.sweep_shard(shard)
+
+    def on_remote_reports_ready(self, reports):
+        """Store the historical war reports received from the remote server"""
+        if self.from_inactive_shard():
+            return
+        # Add all reports from the response, keeping a 2-hour window (12 reports)
+        # The list is replaced rather than extended so readers never see it half-updated
+        self.previous_war_reports = (self.previous_war_reports + list(reports))[-12:]
         
+        print(f"Successfully updated war reports. Now have {len(self.previous_war_reports)} reports.")
+        self.update_map_combo()
+
+    def on_sweep_ready(self, snapshots):
+        """Refresh the combo colours and control labels once a sweep has been published"""
+        self.sweep_versions[self.sender_shard()] = tuple(
+            snapshot.dynamic.version if snapshot.dynamic is not None else None for _, snapshot in sorted(snapshots.items())
+        )
+        if self.from_inactive_shard():
+            return
+        self.update_map_combo()
+        self.update_control_labels()
+
+    def update_map_combo(self):
+        """Update the combo box with activity indicators and faction control colors"""
         # Get current selection without any indicators
         current_text = self.map_combo.currentText()
         for indicator in ["🔴", "🟠", "🟡"]:
@@ -838,7 +1110,9 @@ class MapViewer(QMainWindow):
                 current_text = current_text.replace(indicator, "").strip()
                 break
             
-        # Update combo box items with activity indicators and faction control colors
+        # The rebuild is not a user selection: on_map_selected would cancel the selected map's
+        # fetches and leave the history scrubber, so it must not see the intermediate items
+        self.map_combo.blockSignals(True)
         self.map_combo.clear()
         self.map_combo.addItem("Select a map...")
         
@@ -848,8 +1122,8 @@ class MapViewer(QMainWindow):
             casualties_per_hour = self.get_casualties_per_hour(map_name)
             indicator = self.get_activity_indicator(casualties_per_hour)
             
-            # Count structures and determine faction control
-            structure_counts = self.count_structures(map_name)
+            # Determine faction control from the latest sweep
+            structure_counts = self.aggregates.team_counts(self.get_api_map_name(map_name))
             if structure_counts['WARDENS'] > structure_counts['COLONIALS']:
                 color = "blue"
             elif structure_counts['COLONIALS'] > structure_counts['WARDENS']:
@@ -861,17 +1135,6 @@ class MapViewer(QMainWindow):
             display_text = f"{map_name} {indicator}" if indicator else map_name
             self.map_combo.addItem(display_text)
             self.map_combo.setItemData(self.map_combo.count() - 1, QColor(color), Qt.ForegroundRole)
-                       
-        total_structure_counts = self.count_all_structures()
-           
-        self.map_control_percentage_label_colonial.setText(
-            f"Colonial Control: {total_structure_counts['COLONIAL_PERCENT']:.1f}% ({total_structure_counts['COLONIALS']:,} structures)"
-        )
-        self.map_control_percentage_label_warden.setText(
-            f"Warden Control: {total_structure_counts['WARDEN_PERCENT']:.1f}% ({total_structure_counts['WARDENS']:,} structures)"
-        )
-
-
                 
         # Restore the previous selection
         for i in range(self.map_combo.count()):
@@ -879,9 +1142,100 @@ class MapViewer(QMainWindow):
             if current_text in item_text:  # This will match the map name regardless of indicator
                 self.map_combo.setCurrentIndex(i)
                 break
+        self.map_combo.blockSignals(False)
+
+    def on_fetch_state_changed(self, key):
+        """Show how many requests are still in flight"""
+        if self.from_inactive_shard():
+            return
+        if self.api.breaker.state != CircuitBreaker.CLOSED:
+            self.fetch_status_label.setText("War API unavailable, showing cached data")
+        elif self.fetch_service.is_busy():
+            self.fetch_status_label.setText(f"Fetching... ({len(self.fetch_service.in_flight)} in flight)")
+        else:
+            self.fetch_status_label.setText(f"Up to date ({datetime.now():%H:%M:%S})")
+
+    def on_fetch_finished(self, key):
+        """Teach the scheduler about a finished fetch and re-arm its timer"""
+        if key == "sweep":
+            shard = self.sender_shard()
+            scheduler = self.get_scheduler(shard)
+            scheduler.record_result(key, version=self.sweep_versions.get(shard))
+            self.schedule_refresh(self.get_sweep_timer(shard), key, scheduler)
+        if self.from_inactive_shard():
+            return
+        self.on_fetch_state_changed(key)
+        if self.current_map and key == f"map:{self.current_map}" and self.snapshot is not None and self.snapshot.dynamic is not None:
+            map_data = self.snapshot.dynamic
+            last_updated = map_data.last_updated
+            self.scheduler.record_result(
+                key,
+                version=map_data.version,
+                last_updated=last_updated / 1000 if last_updated else None,
+                max_age=self.api.get_max_age(self.api.map_data_endpoint(self.current_map))
+            )
+            self.schedule_refresh(self.update_timer, key)
+
+    def on_fetch_failed(self, key, error):
+        """Report a failed background request and schedule a retry with backoff"""
+        shard = self.sender_shard()
+        print(f"Error fetching {key} ({shard}): {error}")
+        if key == "sweep":
+            scheduler = self.get_scheduler(shard)
+            scheduler.record_error(key)
+            self.schedule_refresh(self.get_sweep_timer(shard), key, scheduler)
+        if self.from_inactive_shard():
+            return
+        self.fetch_status_label.setText(f"Update failed: {key}")
+        if self.current_map and key == f"map:{self.current_map}":
+            self.scheduler.record_error(key)
+            self.schedule_refresh(self.update_timer, key)
+
+    def schedule_refresh(self, timer, key, scheduler=None):
+        """Start a single-shot refresh timer with the (active shard's, by default) scheduler's delay for key"""
+        delay = (scheduler or self.scheduler).next_delay(key)
+        timer.start(int(delay * 1000))
+
+    def set_window_hidden(self, hidden):
+        """Switch every shard's scheduler to its low-frequency mode and catch up when the window returns"""
+        if hidden == self.scheduler.hidden:
+            return
+        for scheduler in self.schedulers.values():
+            scheduler.set_hidden(hidden)
+        if not hidden:
+            self.update_map_data()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.set_window_hidden(self.isMinimized())
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.set_window_hidden(True)
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        self.set_window_hidden(self.isMinimized())
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        """Stop refreshing and let running requests finish writing the caches and history before exiting"""
+        self.update_timer.stop()
+        self.selection_timer.stop()
+        self.location_search_timer.stop()
+        for timer in self.sweep_timers.values():
+            timer.stop()
+        for fetch_service in self.fetch_services.values():
+            fetch_service.cancel_all()
+        # Bounded so a stalled upstream cannot freeze the window; the SQLite stores use WAL,
+        # so a request cut short at exit cannot leave them inconsistent
+        deadline = time.monotonic() + self.CLOSE_TIMEOUT
+        for fetch_service in self.fetch_services.values():
+            fetch_service.wait_for_done(max(0, int((deadline - time.monotonic()) * 1000)))
+        super().closeEvent(event)
 
     def init_ui(self):
-        self.setWindowTitle('Foxhole Map Viewer')
+        self.setWindowTitle(f'Foxhole Map Viewer - {self.shard}')
         self.setGeometry(100, 100, 1400, 800)
 
         # Create main widget and layout
@@ -897,6 +1251,28 @@ class MapViewer(QMainWindow):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
 
+        # Shard selection
+        self.shard_combo = QComboBox()
+        self.shard_combo.addItems(list(SHARDS))
+        self.shard_combo.setCurrentText(self.shard)
+        self.shard_combo.currentTextChanged.connect(self.on_shard_selected)
+        left_layout.addWidget(QLabel("Shard:"))
+        left_layout.addWidget(self.shard_combo)
+
+        # Location search across the labels of every hex
+        self.location_search = QLineEdit()
+        self.location_search.setPlaceholderText("Town, landmark...")
+        self.location_results = {}  # Completion text -> Location
+        self.location_model = QStringListModel(self)
+        completer = QCompleter(self.location_model, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.activated.connect(self.on_location_chosen)
+        self.location_search.setCompleter(completer)
+        self.location_search.textEdited.connect(self.on_location_search)
+        self.location_search.returnPressed.connect(self.on_location_search_entered)
+        left_layout.addWidget(QLabel("Find Location:"))
+        left_layout.addWidget(self.location_search)
+
         # Map selection
         self.map_combo = QComboBox()
         self.map_combo.currentTextChanged.connect(self.on_map_selected)
@@ -915,6 +1291,19 @@ class MapViewer(QMainWindow):
         
         left_layout.addWidget(self.map_combo)
 
+        # History scrubber; the right end follows live data
+        self.history_slider = QSlider(Qt.Horizontal)
+        self.history_slider.setRange(0, 0)
+        self.history_slider.setEnabled(False)
+        self.history_slider.valueChanged.connect(self.on_history_scrubbed)
+        self.history_label = QLabel("History: Live")
+        left_layout.addWidget(self.history_label)
+        left_layout.addWidget(self.history_slider)
+
+        # Background fetch state
+        self.fetch_status_label = QLabel("Idle")
+        left_layout.addWidget(self.fetch_status_label)
+
         # War Report Section
         war_report_group = QWidget()
         war_report_layout = QVBoxLayout(war_report_group)
@@ -986,7 +1375,7 @@ class MapViewer(QMainWindow):
         splitter.addWidget(left_panel_scroll)
 
         # Map view with visibility settings
-        self.map_view = MapView(visibility_settings=self.visibility_settings)
+        self.map_view = MapView(visibility_settings=self.visibility_settings, proximity_index=self.proximity)
         splitter.addWidget(self.map_view)
 
         # Add settings panel
@@ -1001,20 +1390,75 @@ class MapViewer(QMainWindow):
     def on_map_selected(self, map_name):
         """Handle map selection"""
         if map_name == "Select a map...":
-            self.current_map = None
+            selected_map = None
         else:
             # Remove red dot if present
             if map_name.startswith("🔴 "):
                 map_name = map_name[2:].strip()
-            self.current_map = self.get_api_map_name(map_name)
-        self.update_map_data()
+            selected_map = self.get_api_map_name(map_name)
+        if selected_map == self.current_map:
+            return
+        self.show_live()
+        self.current_map = selected_map
+        self.update_history_slider()
+        # Cancel queued fetches for maps passed over, then fetch once the selection settles
+        self.fetch_service.select_map(self.current_map)
+        self.update_timer.stop()
+        self.selection_timer.start()
+
+    def on_location_search(self, text):
+        """Offer the locations whose names start with the text typed so far"""
+        self.show_location_results(self.fetch_service.static_store.search_locations(text, fuzzy=False))
+        self.location_search_timer.start()
+
+    def on_location_search_paused(self):
+        """Add close misspellings to the offered locations once typing pauses"""
+        results = self.fetch_service.static_store.search_locations(self.location_search.text())
+        if list(self.location_results.values()) != results:
+            self.show_location_results(results)
+            if results:
+                self.location_search.completer().complete()
+
+    def show_location_results(self, results):
+        self.location_results = {
+            f"{location.name} ({location.map_name.replace('Hex', '')})": location for location in results
+        }
+        self.location_model.setStringList(list(self.location_results))
+
+    def on_location_chosen(self, text):
+        self.location_search_timer.stop()
+        location = self.location_results.get(text)
+        if location is not None:
+            self.go_to_location(location)
+
+    def on_location_search_entered(self):
+        """Jump to the best match when Enter is pressed without picking a completion"""
+        self.location_search_timer.stop()
+        text = self.location_search.text()
+        if text in self.location_results:
+            self.go_to_location(self.location_results[text])
+            return
+        results = self.fetch_service.static_store.search_locations(text, 1)
+        if results:
+            self.go_to_location(results[0])
+
+    def go_to_location(self, location):
+        """Show a location's hex and centre the map on its label"""
+        self.map_view.focus_on(location.map_name, location.x, location.y)
+        if location.map_name == self.current_map:
+            return
+        display_name = location.map_name.replace('Hex', '')
+        for i in range(self.map_combo.count()):
+            if self.map_combo.itemText(i).split(' ')[0] == display_name:
+                self.map_combo.setCurrentIndex(i)
+                break
 
     def calculate_total_casualties(self):
         """Calculate total casualties across all maps"""
         total_colonial = 0
         total_warden = 0
         
-        if not self.previous_war_reports:
+        if not self.previous_war_reports or self.shard != DEFAULT_SHARD:
             return (total_colonial, total_warden)
             
         # Get the latest report
@@ -1026,18 +1470,28 @@ class MapViewer(QMainWindow):
             
         return (total_colonial, total_warden)
 
+    @staticmethod
+    def _or_dash(value):
+        return '-' if value is None else value
+
+    @staticmethod
+    def _or_na(value):
+        return 'N/A' if value is None else value
+
     def update_war_report(self):
         """Update the war report display with the latest data"""
         if not self.current_map:
             return
             
-        try:
-            self.war_report = self.api.get_war_report(self.current_map)
+        war_report = self.snapshot.war_report if self.snapshot and self.snapshot.map_name == self.current_map else None
+        if not war_report:
+            return
             
+        try:
             # Update individual map statistics
-            self.total_enlistments_label.setText(f"Total Enlistments: {self.war_report.get('totalEnlistments', '-')}")
-            self.colonial_casualties_label.setText(f"Colonial Casualties: {self.war_report.get('colonialCasualties', '-')}")
-            self.warden_casualties_label.setText(f"Warden Casualties: {self.war_report.get('wardenCasualties', '-')}")
+            self.total_enlistments_label.setText(f"Total Enlistments: {self._or_dash(war_report.total_enlistments)}")
+            self.colonial_casualties_label.setText(f"Colonial Casualties: {self._or_dash(war_report.colonial_casualties)}")
+            self.warden_casualties_label.setText(f"Warden Casualties: {self._or_dash(war_report.warden_casualties)}")
             
             # Update total casualties with formatted numbers
             total_colonial, total_warden = self.calculate_total_casualties()
@@ -1064,7 +1518,7 @@ class MapViewer(QMainWindow):
                 f"<span style='color: {warden_color};'>{int(warden_cph)}</span>"
             )
             
-            day_of_war = self.war_report.get('dayOfWar')
+            day_of_war = war_report.day_of_war
             if day_of_war is not None:
                 self.day_of_war_label.setText(f"Day of War: {day_of_war}")
             else:
@@ -1074,27 +1528,125 @@ class MapViewer(QMainWindow):
             print(f"Error updating war report: {e}")
 
     def update_map_data(self):
-        """Update both map data and war report"""
+        """Request map data and war report for the selected map in the background"""
         if not self.current_map:
             return
             
+        # Show whatever the store already holds (e.g. from a sweep) straight away
+        snapshot = self.fetch_service.store.get(self.current_map)
+        if snapshot is not None and snapshot is not self.snapshot:
+            self.show_snapshot(snapshot)
+        self.fetch_service.fetch_map(self.current_map)
+
+    def on_snapshots_changed(self, changed):
+        """Apply newly published hex snapshots to their shard's aggregates and, for the selected map, the view"""
+        counts_changed = self.apply_snapshots(changed, self.sender_shard())
+        if self.from_inactive_shard():
+            return
+        if counts_changed:
+            self.update_control_labels()
+        if self.current_map in changed:
+            self.show_snapshot(changed[self.current_map])
+
+    def apply_snapshots(self, snapshots, shard=None):
+        """
+        Bring a shard's aggregates and proximity index up to date with hex snapshots
+
+        Args:
+            snapshots: {map_name: HexSnapshot}
+            shard: Shard the snapshots belong to (the active one by default)
+
+        Returns:
+            True if any structure count changed
+        """
+        aggregates = self.get_world_aggregates(shard or self.shard)
+        proximity = self.get_proximity_index(shard or self.shard)
+        counts_changed = False
+        for map_name, snapshot in snapshots.items():
+            counts_changed = aggregates.update(map_name, snapshot.dynamic) or counts_changed
+            if snapshot.dynamic is not None:
+                proximity.update(map_name, snapshot.dynamic)
+        return counts_changed
+
+    def show_snapshot(self, snapshot):
+        """Display a snapshot of the selected map, unless the scrubber is showing its history"""
+        if snapshot.dynamic is None:
+            return
         try:
-            self.map_data = self.api.get_map_data(self.current_map)
-            # Always fetch static data, ETags will handle caching
-            self.map_view.static_map_data = self.api.get_static_map_data(self.current_map)
-            self.map_view.set_map_data(self.map_data, self.current_map)
+            self.snapshot = snapshot
             self.update_war_report()
-            self.format_map_data()
+            self.update_history_slider()
+            if self.history_seq is not None:
+                return
+            if self.map_view.set_snapshot(snapshot):
+                self.format_map_data()
         except Exception as e:
             print(f"Error updating map data: {e}")
             traceback.print_exc()
 
+    def update_history_slider(self):
+        """Fit the scrubber to the recorded timeline of the selected map"""
+        if not hasattr(self, 'history_slider'):
+            return
+        timeline = self.fetch_service.history.timeline(self.current_map) if self.current_map else []
+        self.history_slider.blockSignals(True)
+        self.history_slider.setRange(0, len(timeline))
+        self.history_slider.setValue(len(timeline) if self.history_seq is None else self.history_seq)
+        self.history_slider.blockSignals(False)
+        self.history_slider.setEnabled(len(timeline) > 1)
+        if self.history_seq is None:
+            self.history_label.setText("History: Live")
+
+    def show_live(self):
+        """Leave the history scrubber, putting the selected map's latest snapshot back into the view"""
+        if self.history_seq is None:
+            return
+        self.history_seq = None
+        self.update_history_slider()
+        if self.snapshot and self.snapshot.map_name == self.current_map and self.snapshot.dynamic is not None:
+            self.map_view.set_snapshot(self.snapshot)
+            self.format_map_data()
+
+    def on_history_scrubbed(self, value):
+        """Show the selected map as recorded at the scrubber position, or live at the right end"""
+        if not self.current_map:
+            return
+        timeline = self.fetch_service.history.timeline(self.current_map)
+        if value >= len(timeline):
+            self.show_live()
+            return
+
+        self.history_seq = value
+        entry = timeline[value]
+        timestamp = entry.last_updated / 1000 if entry.last_updated else entry.recorded_at
+        self.history_label.setText(
+            f"History: {datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')} "
+            f"(version {self._or_na(entry.version)})"
+        )
+        try:
+            map_data = self.fetch_service.history.state_at(self.current_map, value)
+        except Exception as e:
+            print(f"Error loading history for {self.current_map}: {e}")
+            return
+        static_data = self.snapshot.static if self.snapshot and self.snapshot.map_name == self.current_map else None
+        self.map_view.set_snapshot(HexSnapshot(self.current_map, dynamic=map_data, static=static_data))
+        self.format_map_data()
+
     def format_map_data(self):
+        map_data = self.map_view.map_data
+        query = Query({self.current_map: map_data})
+        teams = query.group_by('team')
+        visible = self.map_view.visible_query(query)
         info_text = [
-            f"Region ID: {self.map_data.get('regionId', 'N/A')}",
-            f"Last Updated: {self.map_data.get('lastUpdated', 'N/A')}",
-            f"Version: {self.map_data.get('version', 'N/A')}",
-            f"Total Items: {len(self.map_data.get('mapItems', []))}"
+            f"Region ID: {self._or_na(map_data.region_id)}",
+            f"Last Updated: {self._or_na(map_data.last_updated)}",
+            f"Version: {self._or_na(map_data.version)}",
+            f"Total Items: {len(map_data)}",
+            f"Shown Items: {visible.count()}",
+            f"Warden Items: {teams.get('WARDENS', 0)}",
+            f"Colonial Items: {teams.get('COLONIALS', 0)}",
+            f"Damaged: {query.where(flags=FLAG_DAMAGED).count()}",
+            f"Destroyed: {query.where(flags=FLAG_DESTROYED).count()}"
         ]
         self.info_display.setText("\n".join(info_text))
 
@@ -246,3 +246,42 @@ STRUCTURE_RANGES = {
     IconType.RELIC_BASE_3: 0.063,
     IconType.OBSERVATION_TOWER: 0.11    
 }
+
+# Visibility setting (see settings_panel.VisibilitySettings) that controls each icon type.
+# Icon types not listed here are always shown.
+ICON_VISIBILITY_SETTINGS = {
+    # Core structures
+    IconType.TOWN_BASE_1: 'town_bases',
+    IconType.TOWN_BASE_2: 'town_bases',
+    IconType.TOWN_BASE_3: 'town_bases',
+    IconType.GARRISON_STATION: 'safe_houses',
+    IconType.RELIC_BASE_1: 'relic_bases',
+    IconType.RELIC_BASE_2: 'relic_bases',
+    IconType.RELIC_BASE_3: 'relic_bases',
+    IconType.OBSERVATION_TOWER: 'observation_towers',
+    IconType.COASTAL_GUN: 'coastal_guns',
+    IconType.HOSPITAL: 'other',
+    
+    # Industry
+    IconType.FACTORY: 'industry',
+    IconType.MASS_PRODUCTION_FACTORY: 'industry',
+    IconType.REFINERY: 'industry',
+    IconType.CONSTRUCTION_YARD: 'industry',
+    IconType.VEHICLE_FACTORY: 'industry',
+    IconType.TECH_CENTER: 'industry',
+    IconType.MORTAR_HOUSE: 'industry',
+    IconType.SEAPORT: 'storage',
+    IconType.SHIPYARD: 'storage',
+    IconType.STORAGE_FACILITY: 'storage',
+    
+    # Resources
+    IconType.COMPONENT_MINE: 'components',
+    IconType.COMPONENT_FIELD: 'components',
+    IconType.SULFUR_MINE: 'sulfur',
+    IconType.SULFUR_FIELD: 'sulfur',
+    IconType.SALVAGE_MINE: 'salvage',
+    IconType.SALVAGE_FIELD: 'salvage',
+    IconType.COAL_FIELD: 'coal-oil',
+    IconType.OIL_FIELD: 'coal-oil',
+    IconType.FACILITY_MINE_OIL_RIG: 'coal-oil',
+}
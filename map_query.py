@@ -0,0 +1,199 @@
+import numpy as np
+from map_icons import ICON_VISIBILITY_SETTINGS
+from war_models import TEAM_CODES, TEAM_NAMES
+
+# Categories are the visibility settings icon types are grouped under
+CATEGORIES = tuple(sorted(set(ICON_VISIBILITY_SETTINGS.values())))
+_CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+_NO_CATEGORY = -1
+_ICON_SLOTS = 1 << 16  # Covers every int16 icon type once offset by 2**15
+
+# Category code of every icon type, indexed by icon_type + 2**15
+_CATEGORY_LOOKUP = np.full(_ICON_SLOTS, _NO_CATEGORY, dtype=np.int16)
+for _icon_type, _category in ICON_VISIBILITY_SETTINGS.items():
+    _CATEGORY_LOOKUP[int(_icon_type) + (_ICON_SLOTS >> 1)] = _CATEGORY_CODES[_category]
+
+GROUP_KEYS = ('hex', 'icon_type', 'team', 'category', 'flags')
+
+# (offset, bits) of each group key when a combination is packed into one int64
+_GROUP_FIELDS = {
+    'hex': (0, 16),
+    'icon_type': (1 << 15, 16),
+    'team': (0, 4),
+    'category': (1, 8),  # -1 (uncategorised) becomes 0
+    'flags': (0, 8),
+}
+
+def icon_categories(icon_type):
+    """Return the category code of every entry of an icon type array (-1 if uncategorised)"""
+    return _CATEGORY_LOOKUP[icon_type.astype(np.int32) + (_ICON_SLOTS >> 1)]
+
+def _icon_types_in(categories):
+    codes = [_CATEGORY_CODES[category] for category in categories]
+    return [int(icon_type) for icon_type, category in ICON_VISIBILITY_SETTINGS.items() if _CATEGORY_CODES[category] in codes]
+
+class Query:
+    """
+    Filter, count and group map items across any set of hex snapshots
+
+    A query runs over {map_name: DynamicMapData}, so current snapshots
+    from the SnapshotStore and past ones from the HistoryStore work alike.
+    Each where() returns a new query ANDed with the previous filters, and
+    every filter is evaluated as array masks over the snapshot columns:
+
+        Query(snapshots).where(categories=['relic_bases'], teams=['COLONIALS'], flags=FLAG_DAMAGED).count()
+    """
+
+    def __init__(self, snapshots, filters=()):
+        self.snapshots = {name: data for name, data in snapshots.items() if data is not None}
+        self.filters = tuple(filters)
+
+    def where(self, hexes=None, icon_types=None, categories=None, exclude_categories=None,
+              teams=None, flags=0, without_flags=0, bbox=None):
+        """
+        Return a query that also requires every given criterion
+
+        Args:
+            hexes: API map names to include
+            icon_types: IconType values to include
+            categories: Visibility categories (see CATEGORIES) to include
+            exclude_categories: Visibility categories to leave out
+            teams: Team names ('WARDENS', 'COLONIALS', 'NONE') to include
+            flags: Flag bits that must all be set
+            without_flags: Flag bits that must all be clear
+            bbox: (left, top, right, bottom) in the hex's 0-1 coordinates
+
+        Returns:
+            New Query
+        """
+        criteria = {}
+        if hexes is not None:
+            criteria['hexes'] = frozenset(hexes)
+        if icon_types is not None:
+            criteria['icon_types'] = [int(icon_type) for icon_type in icon_types]
+        if categories is not None:
+            criteria['icon_types_in'] = _icon_types_in(categories)
+        if exclude_categories:
+            criteria['icon_types_out'] = _icon_types_in(exclude_categories)
+        if teams is not None:
+            criteria['teams'] = [TEAM_CODES[team] for team in teams]
+        if flags:
+            criteria['flags'] = flags
+        if without_flags:
+            criteria['without_flags'] = without_flags
+        if bbox is not None:
+            criteria['bbox'] = tuple(bbox)
+        return Query(self.snapshots, self.filters + (criteria,))
+
+    def mask(self, map_name, data=None):
+        """Return the boolean mask of the items of one hex that match the query"""
+        data = self.snapshots.get(map_name) if data is None else data
+        if data is None:
+            return np.zeros(0, dtype=bool)
+        mask = np.ones(len(data), dtype=bool)
+        for criteria in self.filters:
+            if 'hexes' in criteria and map_name not in criteria['hexes']:
+                return np.zeros(len(data), dtype=bool)
+            if 'icon_types' in criteria:
+                mask &= np.isin(data.icon_type, criteria['icon_types'])
+            if 'icon_types_in' in criteria:
+                mask &= np.isin(data.icon_type, criteria['icon_types_in'])
+            if 'icon_types_out' in criteria:
+                mask &= ~np.isin(data.icon_type, criteria['icon_types_out'])
+            if 'teams' in criteria:
+                mask &= np.isin(data.team, criteria['teams'])
+            if 'flags' in criteria:
+                mask &= (data.flags & criteria['flags']) == criteria['flags']
+            if 'without_flags' in criteria:
+                mask &= (data.flags & criteria['without_flags']) == 0
+            if 'bbox' in criteria:
+                left, top, right, bottom = criteria['bbox']
+                mask &= (data.x >= left) & (data.x <= right) & (data.y >= top) & (data.y <= bottom)
+        return mask
+
+    def _hexes(self):
+        """Yield (map_name, data) of the hexes the filters can match"""
+        names = set(self.snapshots)
+        for criteria in self.filters:
+            if 'hexes' in criteria:
+                names &= criteria['hexes']
+        for name in sorted(names):
+            yield name, self.snapshots[name]
+
+    def count(self):
+        """Return the number of matching items"""
+        return sum(int(np.count_nonzero(self.mask(name, data))) for name, data in self._hexes())
+
+    def indices(self):
+        """Return {map_name: index array} of the matching items of every hex with a match"""
+        result = {}
+        for name, data in self._hexes():
+            matches = np.flatnonzero(self.mask(name, data))
+            if matches.size:
+                result[name] = matches
+        return result
+
+    def items(self):
+        """Return [(map_name, MapItem)] of every matching item"""
+        return [
+            (name, self.snapshots[name].item(int(index)))
+            for name, matches in self.indices().items() for index in matches
+        ]
+
+    def group_by(self, *keys):
+        """
+        Count matching items per combination of keys
+
+        Args:
+            *keys: One or more of GROUP_KEYS
+
+        Returns:
+            {value: count} for a single key, {(value, ...): count} for several;
+            hexes are map names, teams are team names and categories are
+            category names (None if uncategorised)
+        """
+        unknown = [key for key in keys if key not in GROUP_KEYS]
+        if not keys or unknown:
+            raise ValueError(f"Group keys must be among {', '.join(GROUP_KEYS)}")
+
+        # Pack each item's key values into one int64 so grouping is a single 1-D unique
+        names = []
+        packed = []
+        for name, data in self._hexes():
+            mask = self.mask(name, data)
+            if not mask.any():
+                continue
+            hex_index = len(names)
+            names.append(name)
+            combined = np.zeros(int(np.count_nonzero(mask)), dtype=np.int64)
+            for key in keys:
+                if key == 'hex':
+                    column = hex_index
+                elif key == 'category':
+                    column = icon_categories(data.icon_type[mask])
+                else:
+                    column = getattr(data, key)[mask]
+                offset, bits = _GROUP_FIELDS[key]
+                combined = (combined << bits) | (np.asarray(column, dtype=np.int64) + offset)
+            packed.append(combined)
+        if not names:
+            return {}
+
+        groups, counts = np.unique(np.concatenate(packed), return_counts=True)
+        decode = {
+            'hex': lambda value: names[value],
+            'icon_type': int,
+            'team': lambda value: TEAM_NAMES[value],
+            'category': lambda value: CATEGORIES[value] if value != _NO_CATEGORY else None,
+            'flags': int,
+        }
+        result = {}
+        for group, count in zip(groups.tolist(), counts.tolist()):
+            values = []
+            for key in reversed(keys):
+                offset, bits = _GROUP_FIELDS[key]
+                values.append(decode[key]((group & ((1 << bits) - 1)) - offset))
+                group >>= bits
+            values = tuple(reversed(values))
+            result[values[0] if len(keys) == 1 else values] = count
+        return result
@@ -0,0 +1,169 @@
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QImageReader
+
+MAPS_DIR = "maps"
+DEFAULT_TILE_CACHE_DIR = os.path.join("cache", "tiles")
+TILE_SIZE = 256  # Pixels per tile side at every level
+_MANIFEST_VERSION = 1
+
+def find_map_image(map_name, maps_dir=MAPS_DIR):
+    """
+    Return the path of a hex's background image, or None if there is none
+
+    Names are matched case-insensitively (the shipped files are e.g.
+    MapDeadlandsHex.TGA), preferring WebP, then PNG, then TGA.
+    """
+    try:
+        files = {name.lower(): name for name in os.listdir(maps_dir)}
+    except OSError:
+        return None
+    candidates = [f"Map{map_name}{ext}" for ext in ('.webp', '.png', '.tga')]
+    # Special case for ClahstraHex
+    candidates.insert(0, f"Map{map_name}Map.tga")
+    for candidate in candidates:
+        if candidate.lower() in files:
+            return os.path.join(maps_dir, files[candidate.lower()])
+    return None
+
+class MapPyramid:
+    """
+    Pre-scaled tiles of one hex's background image, stored on disk
+
+    Level 0 is the source image at its own resolution and each further
+    level halves it, down to a level that fits in one tile. Every level is
+    cut into TILE_SIZE tiles saved as PNG, with a manifest written last
+    that records the source file's size and modification time, so a
+    changed source or an interrupted build is rebuilt.
+    """
+
+    def __init__(self, map_name, source_path, cache_dir=DEFAULT_TILE_CACHE_DIR):
+        self.map_name = map_name
+        self.source_path = source_path
+        self.directory = os.path.join(cache_dir, map_name)
+        size = QImageReader(source_path).size()  # Reads the header only
+        self.width = max(size.width(), 0)
+        self.height = max(size.height(), 0)
+        self.levels = 0  # Number of levels on disk; 0 until loaded or built
+
+    def _stamp(self):
+        stat = os.stat(self.source_path)
+        return {
+            'version': _MANIFEST_VERSION,
+            'source': os.path.basename(self.source_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'tileSize': TILE_SIZE,
+        }
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, "manifest.json")
+
+    def tile_path(self, level, column, row):
+        return os.path.join(self.directory, str(level), f"{column}_{row}.png")
+
+    def load(self):
+        """Use the tiles on disk if they were built from the current source; returns True if so"""
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('stamp') != self._stamp():
+                return False
+            self.width, self.height, self.levels = manifest['width'], manifest['height'], manifest['levels']
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def build(self):
+        """Decode the source image and write every level's tiles; returns True on success"""
+        image = QImage(self.source_path)
+        if image.isNull():
+            print(f"Failed to decode map image {self.source_path}")
+            return False
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+        width, height = image.width(), image.height()
+        levels = 1 + max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE)))
+        try:
+            for level in range(levels):
+                if level:
+                    image = image.scaled(
+                        max(1, math.ceil(width / 2 ** level)),
+                        max(1, math.ceil(height / 2 ** level)),
+                        Qt.IgnoreAspectRatio,
+                        Qt.SmoothTransformation
+                    )
+                os.makedirs(os.path.join(self.directory, str(level)), exist_ok=True)
+                for row in range(math.ceil(image.height() / TILE_SIZE)):
+                    for column in range(math.ceil(image.width() / TILE_SIZE)):
+                        tile = image.copy(column * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                        if not tile.save(self.tile_path(level, column, row), "PNG"):
+                            raise OSError(f"could not write {self.tile_path(level, column, row)}")
+
+            tmp_path = f"{self._manifest_path()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'stamp': self._stamp(), 'width': width, 'height': height, 'levels': levels}, f)
+            os.replace(tmp_path, self._manifest_path())
+        except OSError as e:
+            print(f"Error building map tiles for {self.map_name}: {e}")
+            return False
+        self.width, self.height, self.levels = width, height, levels
+        return True
+
+    def level_for(self, display_width):
+        """Return the coarsest level that still has at least one pixel per device pixel at this display width"""
+        if display_width <= 0 or self.width <= display_width:
+            return 0
+        return min(int(math.log2(self.width / display_width)), self.levels - 1)
+
+    def tiles_in(self, level, left, top, right, bottom):
+        """
+        Return the tiles of a level overlapping a rectangle of the hex's 0-1 coordinates
+
+        Returns:
+            List of (column, row, (left, top, right, bottom)) with each tile's
+            own extent in 0-1 coordinates
+        """
+        # A tile covers TILE_SIZE pixels of a level that is 2**level times smaller than the source
+        tile_width = TILE_SIZE * 2 ** level / self.width
+        tile_height = TILE_SIZE * 2 ** level / self.height
+        columns = math.ceil(1 / tile_width)
+        rows = math.ceil(1 / tile_height)
+        first_column, last_column = max(0, int(left / tile_width)), min(columns - 1, int(right / tile_width))
+        first_row, last_row = max(0, int(top / tile_height)), min(rows - 1, int(bottom / tile_height))
+        return [
+            (column, row, (column * tile_width, row * tile_height, (column + 1) * tile_width, (row + 1) * tile_height))
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        ]
+
+class TileCache:
+    """Least recently used tiles decoded from disk, shared by every hex"""
+
+    def __init__(self, max_tiles=96):
+        self.max_tiles = max_tiles
+        self.lock = threading.Lock()
+        self.tiles = OrderedDict()  # (map_name, level, column, row) -> QImage, or None if unreadable
+
+    def get(self, pyramid, level, column, row):
+        key = (pyramid.map_name, level, column, row)
+        with self.lock:
+            if key in self.tiles:
+                self.tiles.move_to_end(key)
+                return self.tiles[key]
+        image = QImage(pyramid.tile_path(level, column, row))
+        image = None if image.isNull() else image
+        with self.lock:
+            self.tiles[key] = image
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+        return image
+
+    def discard(self, map_name):
+        """Forget the tiles of a hex, e.g. after rebuilding them"""
+        with self.lock:
+            for key in [key for key in self.tiles if key[0] == map_name]:
+                del self.tiles[key]
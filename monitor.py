@@ -0,0 +1,67 @@
+"""
+Headless capture and destruction monitor
+
+Polls every hex of a shard without Qt and writes one JSON object per event
+(see war_events.MapEvent.to_json) to stdout, e.g.
+
+    python monitor.py --shard Able --interval 60 >> events.ndjson
+
+Diagnostics go to stderr so stdout stays valid NDJSON.
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from api_client import DEFAULT_SHARD, SHARDS, get_shared_api
+from war_events import EVENT_TYPES, EventEngine
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream Foxhole capture and destruction events as NDJSON")
+    parser.add_argument("--shard", choices=list(SHARDS), default=DEFAULT_SHARD)
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between sweeps (default: 60)")
+    parser.add_argument("--maps", nargs="+", metavar="MAP", help="API map names to watch (default: every map)")
+    parser.add_argument("--events", nargs="+", choices=EVENT_TYPES, default=list(EVENT_TYPES),
+                        help="Event types to emit (default: all)")
+    parser.add_argument("--once", action="store_true",
+                        help="Compare a single sweep against the cached data of the previous run and exit")
+    return parser.parse_args(argv)
+
+def run(shard, interval, map_names, event_types, once, out):
+    """Sweep every interval seconds and write the events of each sweep to out"""
+    api = get_shared_api(shard)
+    engine = EventEngine()
+    event_types = set(event_types)
+    baseline_set = False
+
+    while True:
+        started = time.monotonic()
+        try:
+            names = map_names or api.get_map_names()
+            if not baseline_set:
+                # Start from the data cached by the previous run, so changes made
+                # while the monitor was down are reported on the first sweep
+                engine.process_all({name: api.get_map_data(name, cached_only=True) for name in names})
+                baseline_set = True
+            for event in engine.process_all(api.get_all_map_data(names)):
+                if event.type in event_types:
+                    out.write(json.dumps(event.to_json()) + "\n")
+            out.flush()
+        except Exception as e:
+            print(f"Error during sweep: {e}")
+        if once:
+            return
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = sys.stdout
+    # Library code reports through print(); keep it out of the event stream
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            run(args.shard, args.interval, args.maps, args.events, args.once, out)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import random
+import time
+
+class _RefreshState:
+    """What the scheduler has learned about one refresh key"""
+
+    def __init__(self, default_interval, min_interval, max_interval, hidden_interval):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hidden_interval = hidden_interval
+        self.version = None  # Last seen payload version
+        self.last_change = None  # Time the payload last changed (upstream lastUpdated when known)
+        self.cadence = None  # Smoothed seconds between upstream changes
+        self.unchanged = 0  # Polls in a row that returned the same version
+        self.errors = 0  # Failed polls in a row
+        self.max_age = None  # Cache-Control max-age of the last response
+
+class RefreshScheduler:
+    """
+    Decides when each refresh key (a hex, the all-hex sweep, ...) should be polled next
+
+    The delay follows the upstream update cadence learned from payload versions
+    and lastUpdated timestamps, backs off exponentially on unchanged versions and
+    on errors, never undercuts Cache-Control max-age, and drops to a slow rate
+    while the window is hidden. All delays are jittered so polls do not align.
+    """
+
+    CADENCE_SMOOTHING = 0.3  # Weight of the newest interval in the cadence estimate
+    BACKOFF_FACTOR = 1.5  # Growth per unchanged poll once a change is overdue
+    JITTER = 0.1  # +/- fraction applied to every delay
+
+    def __init__(self):
+        self.states = {}
+        self.hidden = False
+
+    def configure(self, key, default_interval, min_interval=None, max_interval=None, hidden_interval=None):
+        """Register a key with its polling bounds, in seconds"""
+        self.states[key] = _RefreshState(
+            default_interval,
+            min_interval if min_interval is not None else default_interval / 3,
+            max_interval if max_interval is not None else default_interval * 10,
+            hidden_interval if hidden_interval is not None else default_interval * 20
+        )
+
+    def _state(self, key):
+        if key not in self.states:
+            self.configure(key, 30)
+        return self.states[key]
+
+    def set_hidden(self, hidden):
+        """Switch the low-frequency mode used while the window is hidden"""
+        self.hidden = hidden
+
+    def record_result(self, key, version=None, last_updated=None, max_age=None, now=None):
+        """
+        Record a successful poll
+
+        Args:
+            key: Refresh key
+            version: Payload version; None if the payload has none
+            last_updated: Upstream modification time in seconds since the epoch
+            max_age: Cache-Control max-age of the response in seconds
+            now: Current time (defaults to time.time())
+
+        Returns:
+            True if the payload changed since the previous poll
+        """
+        now = time.time() if now is None else now
+        state = self._state(key)
+        state.errors = 0
+        state.max_age = max_age
+
+        changed = version is None or version != state.version
+        if changed:
+            change_time = last_updated if last_updated is not None else now
+            if state.version is not None and state.last_change is not None and change_time > state.last_change:
+                interval = change_time - state.last_change
+                if state.cadence is None:
+                    state.cadence = interval
+                else:
+                    state.cadence += self.CADENCE_SMOOTHING * (interval - state.cadence)
+            state.version = version
+            state.last_change = change_time
+            state.unchanged = 0
+        else:
+            state.unchanged += 1
+        return changed
+
+    def record_error(self, key):
+        """Record a failed poll"""
+        self._state(key).errors += 1
+
+    def next_delay(self, key, now=None):
+        """Return the number of seconds to wait before polling key again"""
+        now = time.time() if now is None else now
+        state = self._state(key)
+
+        if state.errors:
+            delay = state.default_interval * (2 ** state.errors)
+        elif state.cadence is not None and state.last_change is not None:
+            # Aim just after the next expected change, backing off if it is overdue
+            expected = state.last_change + state.cadence - now
+            if expected > 0:
+                delay = expected + state.min_interval / 2
+            else:
+                delay = state.min_interval * (self.BACKOFF_FACTOR ** state.unchanged)
+        else:
+            delay = state.default_interval * (self.BACKOFF_FACTOR ** state.unchanged)
+
+        delay = min(max(delay, state.min_interval), state.max_interval)
+        if state.max_age:
+            delay = max(delay, state.max_age)
+        if self.hidden:
+            delay = max(delay, state.hidden_interval)
+        return delay * random.uniform(1 - self.JITTER, 1 + self.JITTER)
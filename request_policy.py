@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an unhealthy upstream
+
+    After failure_threshold consecutive failures the breaker opens and
+    rejects requests for reset_timeout seconds. It then lets a single
+    probe through (half-open); a success closes it again, a failure
+    re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self._state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    @property
+    def state(self):
+        with self.lock:
+            if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """Return True if a request may be sent now"""
+        with self.lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self._state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+
+class LatencyTracker:
+    """Keeps a sliding window of request latencies per endpoint kind"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}  # kind -> deque of seconds
+
+    def record(self, kind, seconds):
+        with self.lock:
+            self.samples.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, kind, percent):
+        """Return the given latency percentile in seconds, or None without samples"""
+        with self.lock:
+            samples = sorted(self.samples.get(kind, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self):
+        """Return {kind: {'count', 'p50', 'p90', 'p99'}} for every kind seen"""
+        with self.lock:
+            kinds = list(self.samples)
+        return {
+            kind: {
+                'count': len(self.samples[kind]),
+                'p50': self.percentile(kind, 50),
+                'p90': self.percentile(kind, 90),
+                'p99': self.percentile(kind, 99),
+            }
+            for kind in kinds
+        }
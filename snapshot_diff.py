@@ -0,0 +1,100 @@
+import numpy as np
+
+# Item positions are matched on a grid of 1/65536 of a hex, well below the
+# float32 resolution the API values survive decoding with
+POSITION_STEPS = 1 << 16
+_POSITION_BITS = 18
+_RANK_BITS = 8
+
+class SnapshotDiff:
+    """
+    Differences between two DynamicMapData snapshots of the same hex
+
+    Items are matched by identity (icon type plus position), so a structure
+    that changes team or flags shows up in changed rather than as a
+    removal and an addition. All index arrays are int64.
+    """
+
+    __slots__ = ('old', 'new', 'added', 'removed', 'changed', 'changed_old')
+
+    def __init__(self, old, new, added, removed, changed, changed_old):
+        self.old = old
+        self.new = new
+        self.added = added  # Indices into new of items missing from old
+        self.removed = removed  # Indices into old of items missing from new
+        self.changed = changed  # Indices into new of items whose team or flags changed
+        self.changed_old = changed_old  # The matching indices into old
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return f"SnapshotDiff(added={len(self.added)}, removed={len(self.removed)}, changed={len(self.changed)})"
+
+def item_keys(snapshot):
+    """
+    Return one int64 identity key per item of a snapshot
+
+    The key packs icon type and quantised position. Items sharing type and
+    position are told apart by their order of appearance, so keys are unique
+    within a snapshot.
+    """
+    limit = (1 << _POSITION_BITS) - 1
+    qx = np.clip(np.rint(snapshot.x.astype(np.float64) * POSITION_STEPS), 0, limit).astype(np.int64)
+    qy = np.clip(np.rint(snapshot.y.astype(np.float64) * POSITION_STEPS), 0, limit).astype(np.int64)
+    icon_type = snapshot.icon_type.astype(np.int64) & 0xFFFF
+    keys = ((icon_type << (2 * _POSITION_BITS)) | (qx << _POSITION_BITS) | qy) << _RANK_BITS
+
+    # Number duplicates 0, 1, 2, ... in order of appearance
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    if len(sorted_keys):
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(sorted_keys)]))
+        rank = np.minimum(np.arange(len(sorted_keys)) - group_start, (1 << _RANK_BITS) - 1)
+        keys[order] = sorted_keys | rank
+    return keys
+
+def diff_snapshots(old, new):
+    """
+    Compare two snapshots of a hex
+
+    Args:
+        old: Previous DynamicMapData, or None
+        new: Current DynamicMapData
+
+    Returns:
+        SnapshotDiff of the added, removed and changed items
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if old is None:
+        return SnapshotDiff(old, new, np.arange(len(new), dtype=np.int64), empty, empty, empty)
+    if old is new:
+        return SnapshotDiff(old, new, empty, empty, empty, empty)
+
+    old_keys = item_keys(old)
+    new_keys = item_keys(new)
+    _, old_matched, new_matched = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+
+    added = np.setdiff1d(np.arange(len(new), dtype=np.int64), new_matched, assume_unique=True)
+    removed = np.setdiff1d(np.arange(len(old), dtype=np.int64), old_matched, assume_unique=True)
+    differs = (old.team[old_matched] != new.team[new_matched]) | (old.flags[old_matched] != new.flags[new_matched])
+    return SnapshotDiff(
+        old, new,
+        added.astype(np.int64),
+        removed.astype(np.int64),
+        new_matched[differs].astype(np.int64),
+        old_matched[differs].astype(np.int64)
+    )
+
+def find_item(snapshot, item):
+    """Return the index of the item with the same icon type and position as item, or None"""
+    matches = np.flatnonzero(
+        (snapshot.icon_type == item.icon_type)
+        & (snapshot.x == np.float32(item.x))
+        & (snapshot.y == np.float32(item.y))
+    )
+    return int(matches[0]) if matches.size else None
@@ -0,0 +1,108 @@
+import threading
+from types import MappingProxyType
+from PySide6.QtCore import QObject, Signal
+
+class HexSnapshot:
+    """
+    Everything known about one hex at one revision of the store
+
+    Snapshots are immutable: publishing new data creates a new snapshot, so a
+    reference held by a widget or a worker thread never changes underneath it.
+    """
+
+    __slots__ = ('map_name', 'dynamic', 'static', 'war_report', 'revision')
+
+    FIELDS = ('dynamic', 'static', 'war_report')
+
+    def __init__(self, map_name, dynamic=None, static=None, war_report=None, revision=0):
+        object.__setattr__(self, 'map_name', map_name)
+        object.__setattr__(self, 'dynamic', dynamic)  # DynamicMapData
+        object.__setattr__(self, 'static', static)  # StaticMapData
+        object.__setattr__(self, 'war_report', war_report)  # WarReport
+        object.__setattr__(self, 'revision', revision)  # Store revision that created this snapshot
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HexSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("HexSnapshot is immutable")
+
+    def __repr__(self):
+        return f"HexSnapshot(map_name={self.map_name!r}, revision={self.revision})"
+
+class SnapshotStore(QObject):
+    """
+    Single source of truth for the latest snapshot of every hex
+
+    Fetch threads publish into the store; every publish swaps in new
+    snapshots and a new copy of the hex table under one lock, then
+    notifies subscribers. The notification is queued onto the thread of
+    each receiver, so widgets are updated on the GUI thread without any
+    locking of their own.
+    """
+
+    snapshots_changed = Signal(object)  # {map_name: HexSnapshot} of the hexes that changed
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.revision = 0
+        self._snapshots = {}  # map_name -> HexSnapshot; replaced, never mutated
+
+    def get(self, map_name):
+        """Return the latest snapshot of a hex, or None"""
+        return self._snapshots.get(map_name)
+
+    def snapshots(self):
+        """Return a read-only view of the latest snapshot of every hex, consistent at one revision"""
+        return MappingProxyType(self._snapshots)
+
+    def publish(self, map_name, **fields):
+        """
+        Publish new data for one hex
+
+        Args:
+            map_name: API map name
+            **fields: Any of dynamic, static and war_report; None values keep the current data
+
+        Returns:
+            The new HexSnapshot, or None if nothing changed
+        """
+        return self.publish_many({map_name: fields}).get(map_name)
+
+    def publish_many(self, updates):
+        """
+        Publish new data for several hexes as one atomic revision
+
+        Args:
+            updates: {map_name: {field: value}} as for publish()
+
+        Returns:
+            {map_name: HexSnapshot} of the hexes that changed
+        """
+        with self.lock:
+            revision = self.revision + 1
+            changed = {}
+            for map_name, fields in updates.items():
+                unknown = set(fields) - set(HexSnapshot.FIELDS)
+                if unknown:
+                    raise TypeError(f"Unknown snapshot fields: {', '.join(sorted(unknown))}")
+                current = self._snapshots.get(map_name) or HexSnapshot(map_name)
+                values = {
+                    field: fields[field] if fields.get(field) is not None else getattr(current, field)
+                    for field in HexSnapshot.FIELDS
+                }
+                if all(values[field] is getattr(current, field) for field in HexSnapshot.FIELDS):
+                    continue
+                changed[map_name] = HexSnapshot(map_name, revision=revision, **values)
+            if not changed:
+                return {}
+            self._snapshots = {**self._snapshots, **changed}
+            self.revision = revision
+        self.snapshots_changed.emit(changed)
+        return changed
+
+    def clear(self):
+        with self.lock:
+            self._snapshots = {}
+            self.revision += 1
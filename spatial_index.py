@@ -0,0 +1,322 @@
+import threading
+import numpy as np
+from map_icons import STRUCTURE_RANGES
+from map_query import Query
+from world_layout import HEX_ASPECT, WORLD_LAYOUT
+
+def structure_range(icon_type):
+    """Return the (outer) range of a structure in hex widths, or None if it has none"""
+    value = STRUCTURE_RANGES.get(icon_type)
+    if isinstance(value, dict):
+        return value['outer']
+    return value
+
+_MAX_RANGE = max(structure_range(icon_type) for icon_type in STRUCTURE_RANGES)
+
+class SpatialGrid:
+    """
+    Uniform grid over one hex's items for radius and k-nearest queries
+
+    Items are bucketed into cells × cells cells; the item indices of every
+    cell are stored contiguously (sorted by cell) with an offset table, so
+    a query only measures the items of the cells it overlaps.
+    """
+
+    def __init__(self, x, y, cells=16):
+        self.cells = cells
+        self.cell_size = 1.0 / cells
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64) * HEX_ASPECT
+        cell = self._cell_ids(self.x, self.y)
+        self.order = np.argsort(cell, kind='stable')
+        self.offsets = np.searchsorted(cell[self.order], np.arange(cells * cells + 1))
+
+    def _cell_coords(self, values):
+        return np.clip((values / self.cell_size).astype(np.int64), 0, self.cells - 1)
+
+    def _cell_ids(self, x, y):
+        return self._cell_coords(y) * self.cells + self._cell_coords(x)
+
+    def _candidates(self, left, top, right, bottom):
+        """Return the indices of the items in every cell overlapping a rectangle"""
+        x0, x1 = self._cell_coords(np.array([left, right]))
+        y0, y1 = self._cell_coords(np.array([top, bottom]))
+        rows = np.arange(y0, y1 + 1) * self.cells
+        starts = self.offsets[rows + x0]
+        ends = self.offsets[rows + x1 + 1]
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[start:end] for start, end in zip(starts, ends)])
+
+    def _distances(self, indices, x, y):
+        return np.hypot(self.x[indices] - x, self.y[indices] - y)
+
+    def in_rect(self, left, top, right, bottom):
+        """Return the indices, in item order, of the items inside a rectangle of the hex's 0-1 coordinates"""
+        top, bottom = top * HEX_ASPECT, bottom * HEX_ASPECT
+        indices = self._candidates(left, top, right, bottom)
+        x, y = self.x[indices], self.y[indices]
+        return np.sort(indices[(x >= left) & (x <= right) & (y >= top) & (y <= bottom)])
+
+    def within(self, x, y, radius, mask=None):
+        """
+        Return (indices, distances) of the items within radius of a point, nearest first
+
+        Args:
+            x, y: Point in the hex's 0-1 coordinates
+            radius: Search radius in hex widths
+            mask: Optional boolean array of the items that may be returned
+        """
+        y = y * HEX_ASPECT
+        indices = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        if mask is not None:
+            indices = indices[mask[indices]]
+        distances = self._distances(indices, x, y)
+        keep = distances <= radius
+        indices, distances = indices[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return indices[order], distances[order]
+
+    def nearest(self, x, y, k=1, mask=None):
+        """Return (indices, distances) of the k items nearest to a point, nearest first"""
+        y = y * HEX_ASPECT
+        total = len(self.x) if mask is None else int(np.count_nonzero(mask))
+        k = min(k, total)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Grow a square of cells until it holds k items that are provably nearest
+        ring = 0
+        while True:
+            half = (ring + 1) * self.cell_size
+            indices = self._candidates(x - half, y - half, x + half, y + half)
+            if mask is not None:
+                indices = indices[mask[indices]]
+            distances = self._distances(indices, x, y)
+            # Every item within half of the point lies inside the square; ones further out may not be nearest
+            proven = np.count_nonzero(distances <= half)
+            if proven >= k or len(indices) == total:
+                order = np.argsort(distances, kind='stable')[:k]
+                return indices[order], distances[order]
+            ring += 1
+
+class ScreenHash:
+    """
+    Spatial hash of item positions on screen, for pointer hit-testing
+
+    Items are bucketed into square cells as wide as the hit radius, so a
+    lookup only measures the items of the 3x3 cells around the pointer,
+    however many items the view holds.
+    """
+
+    def __init__(self, screen_x, screen_y, indices, radius):
+        """
+        Args:
+            screen_x, screen_y: Screen positions of the items, aligned with indices
+            indices: Item indices the positions belong to
+            radius: Hit radius in pixels
+        """
+        self.radius = radius
+        self.x = np.asarray(screen_x, dtype=np.float64)
+        self.y = np.asarray(screen_y, dtype=np.float64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        keys = self._keys(self.x, self.y)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else keys
+        ends = np.r_[starts[1:], len(keys)]
+        self.cells = {key: order[start:end] for key, start, end in zip(keys[starts].tolist(), starts.tolist(), ends.tolist())}
+
+    def _keys(self, x, y):
+        """Pack the cell column and row of each position into one int64"""
+        return (np.floor(x / self.radius).astype(np.int64) << 32) + np.floor(y / self.radius).astype(np.int64)
+
+    def hit(self, x, y, mask=None):
+        """
+        Return the lowest item index within the hit radius of a screen point, or None
+
+        Args:
+            x, y: Screen point
+            mask: Optional boolean array over all items of the ones that may be hit
+        """
+        column, row = int(np.floor(x / self.radius)), int(np.floor(y / self.radius))
+        candidates = [
+            self.cells[key] for key in (
+                ((column + dx) << 32) + row + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            ) if key in self.cells
+        ]
+        if not candidates:
+            return None
+        candidates = np.concatenate(candidates)
+        dx = self.x[candidates] - x
+        dy = self.y[candidates] - y
+        hits = self.indices[candidates[dx * dx + dy * dy < self.radius * self.radius]]
+        if mask is not None:
+            hits = hits[mask[hits]]
+        return int(hits.min()) if hits.size else None
+
+class ProximityIndex:
+    """
+    Spatial grids for the latest snapshot of every hex
+
+    A new snapshot whose item positions are unchanged (the usual case: only
+    teams and flags move) keeps its grid, so only hexes where structures
+    appeared or vanished are re-bucketed.
+    """
+
+    def __init__(self, cells=16, layout=WORLD_LAYOUT):
+        self.cells = cells
+        self.layout = layout  # WorldLayout for queries that cross hex borders
+        self.lock = threading.Lock()
+        self.snapshots = {}  # map_name -> DynamicMapData the grid answers for
+        self.grids = {}  # map_name -> SpatialGrid
+
+    def update(self, map_name, snapshot):
+        """Index a new snapshot of a hex; returns the grid"""
+        with self.lock:
+            previous = self.snapshots.get(map_name)
+            grid = self.grids.get(map_name)
+            if previous is not snapshot:
+                if grid is None or previous is None or not (
+                    np.array_equal(previous.x, snapshot.x) and np.array_equal(previous.y, snapshot.y)
+                ):
+                    grid = SpatialGrid(snapshot.x, snapshot.y, self.cells)
+                    self.grids[map_name] = grid
+                self.snapshots[map_name] = snapshot
+            return grid
+
+    def _prepare(self, map_name, icon_types, teams):
+        with self.lock:
+            snapshot = self.snapshots.get(map_name)
+            grid = self.grids.get(map_name)
+        if snapshot is None:
+            return None, None, None
+        query = Query({map_name: snapshot})
+        if icon_types is not None or teams is not None:
+            query = query.where(icon_types=icon_types, teams=teams)
+        return snapshot, grid, query.mask(map_name)
+
+    def nearest(self, map_name, x, y, k=1, icon_types=None, teams=None):
+        """
+        Return the k structures of a hex nearest to a point
+
+        Args:
+            map_name: API map name
+            x, y: Point in the hex's 0-1 coordinates
+            k: Number of structures
+            icon_types: IconType values to consider (default: all)
+            teams: Team names to consider (default: all)
+
+        Returns:
+            List of (MapItem, distance in hex widths), nearest first
+        """
+        snapshot, grid, mask = self._prepare(map_name, icon_types, teams)
+        if snapshot is None:
+            return []
+        indices, distances = grid.nearest(x, y, k, mask)
+        return [(snapshot.item(int(index)), float(distance)) for index, distance in zip(indices, distances)]
+
+    def within(self, map_name, x, y, radius, icon_types=None, teams=None):
+        """Return [(MapItem, distance)] of the structures within radius hex widths of a point, nearest first"""
+        snapshot, grid, mask = self._prepare(map_name, icon_types, teams)
+        if snapshot is None:
+            return []
+        indices, distances = grid.within(x, y, radius, mask)
+        return [(snapshot.item(int(index)), float(distance)) for index, distance in zip(indices, distances)]
+
+    def covering(self, map_name, x, y, icon_types=None, teams=None):
+        """
+        Return the structures whose range (per STRUCTURE_RANGES) covers a point
+
+        Returns:
+            List of (MapItem, distance, range), nearest first
+        """
+        ranged = list(STRUCTURE_RANGES) if icon_types is None else [t for t in icon_types if t in STRUCTURE_RANGES]
+        return [
+            (item, distance, structure_range(item.icon_type))
+            for item, distance in self.within(map_name, x, y, _MAX_RANGE, ranged, teams)
+            if distance <= structure_range(item.icon_type)
+        ]
+
+    def _world_hexes(self, map_name, max_hops):
+        """Return the layout index of a hex and the mask of hexes a world query may search"""
+        origin = self.layout.index[map_name]
+        hops = self.layout.hops[origin]
+        allowed = hops >= 0
+        if max_hops is not None:
+            allowed &= hops <= max_hops
+        return origin, allowed
+
+    def nearest_world(self, map_name, x, y, k=1, icon_types=None, teams=None, max_hops=None):
+        """
+        Return the k structures nearest to a point, including those across hex borders
+
+        Hexes are visited in order of their lower-bound distance from the
+        point, and the search stops as soon as no unvisited hex can hold a
+        structure nearer than the k-th one found.
+
+        Args:
+            map_name: API map name of the hex the point is in
+            x, y: Point in the hex's 0-1 coordinates
+            k: Number of structures
+            icon_types: IconType values to consider (default: all)
+            teams: Team names to consider (default: all)
+            max_hops: Only search hexes at most this many borders away
+
+        Returns:
+            List of (map_name, MapItem, distance in hex widths), nearest first
+        """
+        if map_name not in self.layout:
+            return [(map_name, item, distance) for item, distance in self.nearest(map_name, x, y, k, icon_types, teams)]
+        origin, allowed = self._world_hexes(map_name, max_hops)
+        world_x, world_y = self.layout.to_world(map_name, x, y)
+        bounds = self.layout.lower_bounds(world_x, world_y)
+
+        found = []  # (distance, map_name, snapshot, index), nearest first, at most k
+        for hex_index in np.argsort(bounds, kind='stable').tolist():
+            if len(found) == k and bounds[hex_index] > found[-1][0]:
+                break
+            if not allowed[hex_index]:
+                continue
+            name = self.layout.names[hex_index]
+            snapshot, grid, mask = self._prepare(name, icon_types, teams)
+            if snapshot is None:
+                continue
+            local_x, local_y = self.layout.to_local(name, world_x, world_y)
+            if hex_index == origin:
+                indices, distances = grid.nearest(local_x, local_y, k, mask)
+            else:
+                # The point lies outside this hex, where the grid cannot prune much; measure every candidate
+                indices = np.flatnonzero(mask)
+                distances = grid._distances(indices, local_x, local_y * HEX_ASPECT)
+            found.extend((distance, name, snapshot, index) for distance, index in zip(distances.tolist(), indices.tolist()))
+            found.sort(key=lambda entry: entry[0])
+            del found[k:]
+        return [(name, snapshot.item(index), distance) for distance, name, snapshot, index in found]
+
+    def within_world(self, map_name, x, y, radius, icon_types=None, teams=None):
+        """Return [(map_name, MapItem, distance)] of the structures within radius hex widths of a point in any hex, nearest first"""
+        if map_name not in self.layout:
+            return [(map_name, item, distance) for item, distance in self.within(map_name, x, y, radius, icon_types, teams)]
+        _, allowed = self._world_hexes(map_name, None)
+        world_x, world_y = self.layout.to_world(map_name, x, y)
+        candidates = np.flatnonzero(allowed & (self.layout.lower_bounds(world_x, world_y) <= radius))
+        results = []
+        for hex_index in candidates.tolist():
+            name = self.layout.names[hex_index]
+            snapshot, grid, mask = self._prepare(name, icon_types, teams)
+            if snapshot is None:
+                continue
+            local_x, local_y = self.layout.to_local(name, world_x, world_y)
+            indices, distances = grid.within(local_x, local_y, radius, mask)
+            results.extend((name, snapshot.item(int(index)), float(distance)) for index, distance in zip(indices, distances))
+        results.sort(key=lambda result: result[2])
+        return results
+
+    def covering_world(self, map_name, x, y, icon_types=None, teams=None):
+        """Return [(map_name, MapItem, distance, range)] of the structures in any hex whose range covers a point, nearest first"""
+        ranged = list(STRUCTURE_RANGES) if icon_types is None else [t for t in icon_types if t in STRUCTURE_RANGES]
+        return [
+            (name, item, distance, structure_range(item.icon_type))
+            for name, item, distance in self.within_world(map_name, x, y, _MAX_RANGE, ranged, teams)
+            if distance <= structure_range(item.icon_type)
+        ]
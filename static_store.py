@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from location_search import LocationIndex
+from war_models import StaticMapData
+
+DEFAULT_STATIC_STORE_PATH = os.path.join("cache", "static_maps.json")
+
+class StaticMapStore:
+    """
+    Static map data (text labels) for every hex, kept for the lifetime of one war
+
+    The location search index over every hex's labels is rebuilt whenever
+    the stored maps change, including when they are loaded from disk, and
+    replaced as a whole so readers never see it half-built.
+    """
+
+    def __init__(self, api, path=DEFAULT_STATIC_STORE_PATH):
+        self.api = api
+        self.path = path
+        self.lock = threading.Lock()
+        self.war_number = None
+        self.maps = {}  # map_name -> StaticMapData
+        self.locations = LocationIndex()  # Search index over the labels of self.maps
+        self._load()
+
+    def _load(self):
+        """Load the persisted store, ignoring a missing or unreadable file"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.war_number = data.get('warNumber')
+            self.maps = {name: StaticMapData.from_json(map_data) for name, map_data in data.get('maps', {}).items()}
+        except (FileNotFoundError, ValueError, AttributeError):
+            self.war_number = None
+            self.maps = {}
+        self._reindex()
+
+    def _reindex(self):
+        """Rebuild the location index from the stored maps (lock held)"""
+        self.locations = LocationIndex.from_static_data(self.maps)
+
+    def _save(self):
+        """Persist the store atomically so a crash never leaves a half-written file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'warNumber': self.war_number,
+                    'maps': {name: map_data.to_json() for name, map_data in self.maps.items()}
+                }, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving static map data: {e}")
+
+    def refresh(self, map_names):
+        """
+        Make sure the store holds static data for every map of the current war
+
+        Only the war endpoint is requested when the war number is unchanged and
+        every map is already stored; otherwise the missing (or, for a new war,
+        all) maps are prefetched concurrently.
+
+        Returns:
+            True if the store changed
+        """
+        war_data = self.api.get_war_data()
+        war_number = war_data.war_number if war_data else None
+        if war_number is None:
+            return False
+
+        with self.lock:
+            if war_number != self.war_number:
+                if self.war_number is not None:
+                    print(f"War {war_number} started, discarding static data for war {self.war_number}")
+                self.war_number = war_number
+                self.maps = {}
+                self._reindex()
+            missing = [name for name in map_names if name not in self.maps]
+        if not missing:
+            return False
+
+        fetched = self.api.get_all_static_map_data(missing)
+        with self.lock:
+            # Discard results if another refresh moved us to a new war meanwhile
+            if self.war_number != war_number:
+                return False
+            self.maps.update({name: data for name, data in fetched.items() if data is not None})
+            self._reindex()
+            self._save()
+        return True
+
+    def get_cached(self, map_name):
+        """Return stored static data for a map without a network request"""
+        with self.lock:
+            return self.maps.get(map_name)
+
+    def get(self, map_name):
+        """Return static data for a map, fetching and storing it only if it is missing"""
+        with self.lock:
+            if map_name in self.maps:
+                return self.maps[map_name]
+            war_number = self.war_number
+
+        data = self.api.get_static_map_data(map_name)
+        if data is not None:
+            with self.lock:
+                if self.war_number == war_number:
+                    self.maps[map_name] = data
+                    self._reindex()
+                    self._save()
+        return data
+
+    def search_locations(self, query, limit=10, fuzzy=True):
+        """Return the Locations (see location_search) best matching a partial name, across every stored hex"""
+        return self.locations.search(query, limit, fuzzy)
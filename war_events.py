@@ -0,0 +1,142 @@
+import threading
+import time
+from map_icons import IconType
+from snapshot_diff import diff_snapshots
+from war_models import FLAG_DESTROYED, TEAM_NAMES, TEAM_NONE
+
+# Event types
+CAPTURED = "captured"  # A structure now belongs to a team it did not belong to before
+LOST = "lost"  # A structure went from a team back to neutral
+DESTROYED = "destroyed"  # A structure gained the Destroyed flag
+REBUILT = "rebuilt"  # A structure lost the Destroyed flag
+
+EVENT_TYPES = (CAPTURED, LOST, DESTROYED, REBUILT)
+
+def _icon_name(icon_type):
+    try:
+        return IconType(icon_type).name
+    except ValueError:
+        return None
+
+class MapEvent:
+    """A change to one structure between two snapshots of a hex"""
+
+    __slots__ = ('type', 'map_name', 'icon_type', 'team_id', 'previous_team_id', 'x', 'y', 'flags', 'version', 'timestamp')
+
+    def __init__(self, type, map_name, icon_type, team_id, previous_team_id, x, y, flags, version, timestamp):
+        self.type = type  # One of EVENT_TYPES
+        self.map_name = map_name
+        self.icon_type = icon_type
+        self.team_id = team_id
+        self.previous_team_id = previous_team_id
+        self.x = x
+        self.y = y
+        self.flags = flags
+        self.version = version  # Version of the snapshot the change was seen in
+        self.timestamp = timestamp  # Upstream lastUpdated in seconds, or detection time
+
+    def to_json(self):
+        return {
+            'type': self.type,
+            'mapName': self.map_name,
+            'iconType': self.icon_type,
+            'iconName': _icon_name(self.icon_type),
+            'teamId': self.team_id,
+            'previousTeamId': self.previous_team_id,
+            'x': round(self.x, 6),  # float32 precision
+            'y': round(self.y, 6),
+            'flags': self.flags,
+            'version': self.version,
+            'timestamp': self.timestamp,
+        }
+
+    def __repr__(self):
+        return f"MapEvent({self.type}, {self.map_name}, icon_type={self.icon_type}, team_id={self.team_id!r})"
+
+class EventEngine:
+    """
+    Turns successive snapshots of every hex into capture and destruction events
+
+    The first snapshot of a hex only sets the baseline. After that, every
+    new snapshot is diffed against the previous one and the changed items
+    are classified with array masks, so a sweep of all hexes costs a few
+    milliseconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}  # map_name -> last processed DynamicMapData
+
+    def process(self, map_name, snapshot, now=None):
+        """
+        Compare a new snapshot of a hex with the previous one
+
+        Args:
+            map_name: API map name
+            snapshot: DynamicMapData; None is ignored
+            now: Detection time used when the snapshot has no lastUpdated
+
+        Returns:
+            List of MapEvent, in item order
+        """
+        if snapshot is None:
+            return []
+        with self.lock:
+            previous = self.snapshots.get(map_name)
+            self.snapshots[map_name] = snapshot
+        if previous is None or previous is snapshot or (
+            snapshot.version is not None and snapshot.version == previous.version
+        ):
+            return []
+
+        diff = diff_snapshots(previous, snapshot)
+        if not len(diff.changed):
+            return []
+        new, old = diff.changed, diff.changed_old
+        team, old_team = snapshot.team[new], previous.team[old]
+        destroyed = (snapshot.flags[new] & FLAG_DESTROYED) != 0
+        was_destroyed = (previous.flags[old] & FLAG_DESTROYED) != 0
+
+        masks = (
+            (CAPTURED, (team != old_team) & (team != TEAM_NONE)),
+            (LOST, (team != old_team) & (team == TEAM_NONE)),
+            (DESTROYED, destroyed & ~was_destroyed),
+            (REBUILT, ~destroyed & was_destroyed),
+        )
+        if snapshot.last_updated:
+            timestamp = snapshot.last_updated / 1000
+        else:
+            timestamp = time.time() if now is None else now
+
+        events = []
+        for position in range(len(new)):
+            for event_type, mask in masks:
+                if mask[position]:
+                    index, old_index = int(new[position]), int(old[position])
+                    events.append(MapEvent(
+                        event_type, map_name,
+                        int(snapshot.icon_type[index]),
+                        TEAM_NAMES[snapshot.team[index]],
+                        TEAM_NAMES[previous.team[old_index]],
+                        float(snapshot.x[index]),
+                        float(snapshot.y[index]),
+                        int(snapshot.flags[index]),
+                        snapshot.version,
+                        timestamp
+                    ))
+        return events
+
+    def process_all(self, all_map_data, now=None):
+        """Process a sweep ({map_name: DynamicMapData}) and return all events, hex by hex"""
+        events = []
+        for map_name, snapshot in sorted(all_map_data.items()):
+            events.extend(self.process(map_name, snapshot, now))
+        return events
+
+    def reset(self, map_name=None):
+        """Forget the baseline of one hex, or of all hexes"""
+        with self.lock:
+            if map_name is None:
+                self.snapshots.clear()
+            else:
+                self.snapshots.pop(map_name, None)
@@ -0,0 +1,235 @@
+import sys
+import numpy as np
+from map_icons import TeamID
+
+# Canonical team strings so every item shares the same three objects
+_TEAM_IDS = {team.value: sys.intern(team.value) for team in TeamID}
+
+# Compact team codes used by the columnar snapshots
+TEAM_NAMES = (_TEAM_IDS['NONE'], _TEAM_IDS['COLONIALS'], _TEAM_IDS['WARDENS'])
+TEAM_CODES = {name: code for code, name in enumerate(TEAM_NAMES)}
+TEAM_NONE, TEAM_COLONIALS, TEAM_WARDENS = range(3)
+
+# Flag bits of a map item
+FLAG_BUILT = 0x01
+FLAG_DAMAGED = 0x02
+FLAG_DESTROYED = 0x04
+
+def _require(data, key, kind):
+    """Return data[key] if it is of the expected type, otherwise raise ValueError"""
+    value = data.get(key)
+    if not isinstance(value, kind):
+        raise ValueError(f"Expected {key} to be {kind}, got {type(value).__name__}")
+    return value
+
+def _number(value, default=0):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+def map_names_from_json(data):
+    """Decode the payload of the maps endpoint, a list of API map names"""
+    if not isinstance(data, list) or not all(isinstance(name, str) for name in data):
+        raise ValueError("Map list must be a list of names")
+    return tuple(data)
+
+class MapItem:
+    """A structure or resource on a hex, in the hex's 0-1 coordinate space"""
+
+    __slots__ = ('icon_type', 'team_id', 'x', 'y', 'flags')
+
+    def __init__(self, icon_type, team_id, x, y, flags):
+        self.icon_type = icon_type
+        self.team_id = team_id
+        self.x = x
+        self.y = y
+        self.flags = flags
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            int(_number(data.get('iconType'), -1)),
+            _TEAM_IDS.get(data.get('teamId'), _TEAM_IDS['NONE']),
+            float(_number(data.get('x'))),
+            float(_number(data.get('y'))),
+            int(_number(data.get('flags')))
+        )
+
+    def to_json(self):
+        return {'iconType': self.icon_type, 'teamId': self.team_id, 'x': self.x, 'y': self.y, 'flags': self.flags}
+
+    def _key(self):
+        return (self.icon_type, self.team_id, self.x, self.y, self.flags)
+
+    def __eq__(self, other):
+        return isinstance(other, MapItem) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"MapItem(icon_type={self.icon_type}, team_id={self.team_id!r}, x={self.x:.4f}, y={self.y:.4f}, flags={self.flags})"
+
+class MapTextItem:
+    """A location label on a hex"""
+
+    __slots__ = ('text', 'x', 'y', 'marker_type')
+
+    def __init__(self, text, x, y, marker_type):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.marker_type = marker_type  # 'Major' or 'Minor'
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            str(data.get('text', '')),
+            float(_number(data.get('x'))),
+            float(_number(data.get('y'))),
+            sys.intern(str(data.get('mapMarkerType', 'Minor')))
+        )
+
+    def to_json(self):
+        return {'text': self.text, 'x': self.x, 'y': self.y, 'mapMarkerType': self.marker_type}
+
+    def __repr__(self):
+        return f"MapTextItem(text={self.text!r}, marker_type={self.marker_type!r})"
+
+class DynamicMapData:
+    """
+    Decoded payload of maps/{map}/dynamic/public, stored column by column
+
+    Each item attribute is one NumPy array, so filtering, counting and
+    coordinate transforms run vectorised and a snapshot takes a fraction
+    of the memory of a list of dicts. The arrays are read-only. Use item(i)
+    for a single MapItem.
+    """
+
+    __slots__ = ('region_id', 'x', 'y', 'icon_type', 'team', 'flags', 'last_updated', 'version')
+
+    def __init__(self, region_id, x, y, icon_type, team, flags, last_updated, version):
+        self.region_id = region_id
+        self.x = x  # float32, 0-1 across the hex
+        self.y = y  # float32, 0-1 down the hex
+        self.icon_type = icon_type  # int16 IconType values
+        self.team = team  # int8 TEAM_CODES
+        self.flags = flags  # uint8 flag bits
+        self.last_updated = last_updated  # Milliseconds since the epoch
+        self.version = version
+        # Snapshots are shared between threads and widgets, so the columns are read-only
+        for column in (x, y, icon_type, team, flags):
+            column.setflags(write=False)
+
+    @classmethod
+    def from_json(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("Dynamic map data must be an object")
+        items = _require(data, 'mapItems', list)
+        if not all(isinstance(item, dict) for item in items):
+            raise ValueError("Map items must be objects")
+        count = len(items)
+        x = np.fromiter((_number(item.get('x')) for item in items), dtype=np.float32, count=count)
+        y = np.fromiter((_number(item.get('y')) for item in items), dtype=np.float32, count=count)
+        icon_type = np.fromiter((_number(item.get('iconType'), -1) for item in items), dtype=np.int16, count=count)
+        team = np.fromiter((TEAM_CODES.get(item.get('teamId'), TEAM_NONE) for item in items), dtype=np.int8, count=count)
+        flags = np.fromiter((_number(item.get('flags')) for item in items), dtype=np.uint8, count=count)
+        return cls(data.get('regionId'), x, y, icon_type, team, flags, data.get('lastUpdated'), data.get('version'))
+
+    def __len__(self):
+        return len(self.x)
+
+    def item(self, index):
+        """Return the item at index as a MapItem"""
+        return MapItem(
+            int(self.icon_type[index]),
+            TEAM_NAMES[self.team[index]],
+            float(self.x[index]),
+            float(self.y[index]),
+            int(self.flags[index])
+        )
+
+    def items(self):
+        """Iterate over all items as MapItem objects"""
+        return (self.item(i) for i in range(len(self)))
+
+    def team_counts(self):
+        """Return the number of Warden and Colonial items"""
+        counts = np.bincount(self.team, minlength=len(TEAM_NAMES))
+        return {'WARDENS': int(counts[TEAM_WARDENS]), 'COLONIALS': int(counts[TEAM_COLONIALS])}
+
+class StaticMapData:
+    """Decoded payload of maps/{map}/static"""
+
+    __slots__ = ('region_id', 'text_items', 'last_updated', 'version')
+
+    def __init__(self, region_id, text_items, last_updated, version):
+        self.region_id = region_id
+        self.text_items = text_items  # tuple of MapTextItem
+        self.last_updated = last_updated
+        self.version = version
+
+    @classmethod
+    def from_json(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("Static map data must be an object")
+        return cls(
+            data.get('regionId'),
+            tuple(MapTextItem.from_json(item) for item in _require(data, 'mapTextItems', list)),
+            data.get('lastUpdated'),
+            data.get('version')
+        )
+
+    def to_json(self):
+        return {
+            'regionId': self.region_id,
+            'mapTextItems': [item.to_json() for item in self.text_items],
+            'lastUpdated': self.last_updated,
+            'version': self.version,
+        }
+
+class WarReport:
+    """Decoded payload of warReport/{map}"""
+
+    __slots__ = ('total_enlistments', 'colonial_casualties', 'warden_casualties', 'day_of_war', 'version')
+
+    def __init__(self, total_enlistments, colonial_casualties, warden_casualties, day_of_war, version):
+        self.total_enlistments = total_enlistments
+        self.colonial_casualties = colonial_casualties
+        self.warden_casualties = warden_casualties
+        self.day_of_war = day_of_war
+        self.version = version
+
+    @classmethod
+    def from_json(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("War report must be an object")
+        return cls(
+            data.get('totalEnlistments'),
+            data.get('colonialCasualties'),
+            data.get('wardenCasualties'),
+            data.get('dayOfWar'),
+            data.get('version')
+        )
+
+class WarData:
+    """Decoded payload of the war endpoint"""
+
+    __slots__ = ('war_id', 'war_number', 'winner', 'conquest_start_time', 'conquest_end_time')
+
+    def __init__(self, war_id, war_number, winner, conquest_start_time, conquest_end_time):
+        self.war_id = war_id
+        self.war_number = war_number
+        self.winner = winner
+        self.conquest_start_time = conquest_start_time
+        self.conquest_end_time = conquest_end_time
+
+    @classmethod
+    def from_json(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("War data must be an object")
+        return cls(
+            data.get('warId'),
+            data.get('warNumber'),
+            data.get('winner'),
+            data.get('conquestStartTime'),
+            data.get('conquestEndTime')
+        )
@@ -0,0 +1,141 @@
+import threading
+import numpy as np
+from snapshot_diff import diff_snapshots
+from war_models import TEAM_NAMES, TEAM_CODES
+
+# Icon types and flag states are small integers, so counts live in dense arrays
+ICON_SLOTS = 256
+FLAG_STATES = 8  # Built, Damaged and Destroyed bits
+
+class WorldAggregates:
+    """
+    Structure counts per hex and for the whole world, kept up to date incrementally
+
+    Counts are broken down by team, icon type and flag state. Each new
+    snapshot of a hex is diffed against the previous one and only the
+    differing items are added to or subtracted from the per-hex and
+    global tables, so reading a summary never rescans any map items.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}  # map_name -> last applied DynamicMapData
+        self.hex_counts = {}  # map_name -> int32 array [team, icon_type, flags]
+        self.totals = np.zeros((len(TEAM_NAMES), ICON_SLOTS, FLAG_STATES), dtype=np.int64)
+        self.team_totals = np.zeros(len(TEAM_NAMES), dtype=np.int64)
+        self.hex_team_totals = {}  # map_name -> int64 array [team]
+
+    @staticmethod
+    def _indices(snapshot, indices):
+        team = snapshot.team[indices].astype(np.intp)
+        icon_type = np.clip(snapshot.icon_type[indices], 0, ICON_SLOTS - 1).astype(np.intp)
+        flags = (snapshot.flags[indices] & (FLAG_STATES - 1)).astype(np.intp)
+        return team, icon_type, flags
+
+    def _apply(self, map_name, snapshot, indices, sign):
+        """Add (sign=1) or subtract (sign=-1) the given items of snapshot"""
+        if not len(indices):
+            return
+        team, icon_type, flags = self._indices(snapshot, indices)
+        np.add.at(self.hex_counts[map_name], (team, icon_type, flags), sign)
+        np.add.at(self.totals, (team, icon_type, flags), sign)
+        team_delta = sign * np.bincount(team, minlength=len(TEAM_NAMES))
+        self.hex_team_totals[map_name] += team_delta
+        self.team_totals += team_delta
+
+    def update(self, map_name, snapshot):
+        """
+        Apply the latest snapshot of a hex
+
+        Args:
+            map_name: API map name
+            snapshot: DynamicMapData, or None to leave the hex as it is
+
+        Returns:
+            True if any count changed
+        """
+        if snapshot is None:
+            return False
+        with self.lock:
+            previous = self.snapshots.get(map_name)
+            if previous is snapshot or (
+                previous is not None and snapshot.version is not None and snapshot.version == previous.version
+            ):
+                return False
+            if map_name not in self.hex_counts:
+                self.hex_counts[map_name] = np.zeros((len(TEAM_NAMES), ICON_SLOTS, FLAG_STATES), dtype=np.int32)
+                self.hex_team_totals[map_name] = np.zeros(len(TEAM_NAMES), dtype=np.int64)
+
+            diff = diff_snapshots(previous, snapshot)
+            if previous is not None:
+                self._apply(map_name, previous, np.concatenate([diff.removed, diff.changed_old]), -1)
+            self._apply(map_name, snapshot, np.concatenate([diff.added, diff.changed]), 1)
+            self.snapshots[map_name] = snapshot
+            return bool(diff)
+
+    def remove(self, map_name):
+        """Drop a hex from the aggregates"""
+        with self.lock:
+            if map_name not in self.snapshots:
+                return
+            self.totals -= self.hex_counts.pop(map_name)
+            self.team_totals -= self.hex_team_totals.pop(map_name)
+            del self.snapshots[map_name]
+
+    def clear(self):
+        with self.lock:
+            self.snapshots.clear()
+            self.hex_counts.clear()
+            self.hex_team_totals.clear()
+            self.totals[:] = 0
+            self.team_totals[:] = 0
+
+    def team_counts(self, map_name=None):
+        """Return the number of Warden and Colonial structures on a hex, or world-wide"""
+        with self.lock:
+            if map_name is None:
+                counts = self.team_totals
+            else:
+                counts = self.hex_team_totals.get(map_name)
+                if counts is None:
+                    return {'WARDENS': 0, 'COLONIALS': 0}
+            return {team: int(counts[TEAM_CODES[team]]) for team in ('WARDENS', 'COLONIALS')}
+
+    def summary(self):
+        """Return world-wide Warden and Colonial totals and control percentages"""
+        counts = self.team_counts()
+        total = counts['WARDENS'] + counts['COLONIALS']
+        return {
+            'WARDENS': counts['WARDENS'],
+            'COLONIALS': counts['COLONIALS'],
+            'WARDEN_PERCENT': counts['WARDENS'] / total * 100 if total else 0,
+            'COLONIAL_PERCENT': counts['COLONIALS'] / total * 100 if total else 0,
+        }
+
+    def count(self, map_name=None, team=None, icon_type=None, flags=None):
+        """
+        Count structures matching every given criterion
+
+        Args:
+            map_name: API map name; None for the whole world
+            team: Team name ('WARDENS', 'COLONIALS', 'NONE')
+            icon_type: IconType value
+            flags: Flag bits that must all be set
+
+        Returns:
+            Number of matching structures
+        """
+        with self.lock:
+            table = self.totals if map_name is None else self.hex_counts.get(map_name)
+            if table is None:
+                return 0
+            if team is not None:
+                table = table[TEAM_CODES[team]:TEAM_CODES[team] + 1]
+            if icon_type is not None:
+                if not 0 <= icon_type < ICON_SLOTS:
+                    return 0
+                table = table[:, icon_type:icon_type + 1]
+            if flags:
+                states = [state for state in range(FLAG_STATES) if state & flags == flags]
+                table = table[:, :, states]
+            return int(table.sum())
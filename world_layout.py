@@ -0,0 +1,145 @@
+import numpy as np
+
+# Height of a hex map relative to its width (the map images are 1024x888).
+# World distances are measured in hex widths, the unit STRUCTURE_RANGES uses.
+HEX_ASPECT = 888 / 1024
+
+# Hexes are flat-topped: each column is offset by half a hex from its
+# neighbours. (column, row of the topmost hex in half-hex steps, hexes top to
+# bottom); DeadLandsHex sits at column 0, row 0.
+_COLUMNS = (
+    (-3, -1.5, ("NevishLineHex", "OarbreakerHex", "FishermansRowHex", "StemaLandingHex", "SableportHex")),
+    (-2, -3.0, ("KingsCageHex", "CallumsCapeHex", "StonecradleHex", "FarranacCoastHex", "WestgateHex", "OriginHex")),
+    (-1, -2.5, ("SpeakingWoodsHex", "MooringCountyHex", "LinnMercyHex", "LochMorHex", "HeartlandsHex",
+                "RedRiverHex", "AshFieldsHex")),
+    (0, -3.0, ("BasinSionnachHex", "ReachingTrailHex", "CallahansPassageHex", "DeadLandsHex", "UmbralWildwoodHex",
+               "GreatMarchHex", "KalokaiHex")),
+    (1, -2.5, ("HowlCountyHex", "ViperPitHex", "MarbanHollow", "DrownedValeHex", "ShackledChasmHex",
+               "AcrithiaHex", "ReaversPassHex")),
+    (2, -3.0, ("WeatheredExpanseHex", "ClansheadValleyHex", "StlicanShelfHex", "EndlessShoreHex", "AllodsBightHex",
+               "TerminusHex")),
+    (3, -2.5, ("ClahstraHex", "MorgensCrossingHex", "GodcroftsHex", "TempestIslandHex", "TheFingersHex")),
+)
+
+# Axial offsets of the six neighbours of a flat-top hex
+_NEIGHBOUR_OFFSETS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+# Every point of a hex's map image (not just the hex itself) lies within this distance of its centre
+_IMAGE_RADIUS = 0.5 * np.hypot(1.0, HEX_ASPECT)
+
+class WorldLayout:
+    """
+    Global coordinates and adjacency of every hex
+
+    World coordinates are in hex widths with DeadLandsHex's centre at the
+    origin, x to the east and y to the south, so a hex's 0-1 map coordinates
+    convert with one multiply-add and distances match STRUCTURE_RANGES.
+    Hex-to-hex matrices are computed once, indexed like names:
+
+        hops: Border crossings on the shortest path (-1 if unreachable)
+        centre_distances: Distance between hex centres
+        gaps: Lower bound on the distance between any points of two hexes
+    """
+
+    def __init__(self, columns=_COLUMNS):
+        names = []
+        axial = []
+        for column, top, hexes in columns:
+            for offset, name in enumerate(hexes):
+                names.append(name)
+                # Row in half-hex steps is r + q / 2 for axial (q, r)
+                axial.append((column, int(round(top + offset - column / 2))))
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(names)}
+        self.axial = np.array(axial, dtype=np.int64).reshape(-1, 2)
+
+        q, r = self.axial[:, 0], self.axial[:, 1]
+        self.centres = np.column_stack((0.75 * q, HEX_ASPECT * (r + q / 2)))
+        # Top-left corner of every hex's map image in world coordinates
+        self.origins = self.centres - (0.5, 0.5 * HEX_ASPECT)
+
+        positions = {(int(a), int(b)): i for i, (a, b) in enumerate(self.axial)}
+        self.adjacency = np.zeros((len(names), len(names)), dtype=bool)
+        for i, (a, b) in enumerate(self.axial.tolist()):
+            for dq, dr in _NEIGHBOUR_OFFSETS:
+                j = positions.get((a + dq, b + dr))
+                if j is not None:
+                    self.adjacency[i, j] = True
+
+        self.hops = self._hop_matrix(self.adjacency)
+        delta = self.centres[:, None, :] - self.centres[None, :, :]
+        self.centre_distances = np.hypot(delta[..., 0], delta[..., 1])
+        self.gaps = np.maximum(self.centre_distances - 2 * _IMAGE_RADIUS, 0.0)
+
+    @staticmethod
+    def _hop_matrix(adjacency):
+        """Breadth-first search from every hex at once, one boolean matrix product per ring"""
+        count = len(adjacency)
+        hops = np.full((count, count), -1, dtype=np.int64)
+        reached = np.eye(count, dtype=bool)
+        frontier = reached.copy()
+        hops[reached] = 0
+        step = 0
+        while frontier.any():
+            step += 1
+            frontier = (frontier.astype(np.int64) @ adjacency.astype(np.int64) > 0) & ~reached
+            hops[frontier] = step
+            reached |= frontier
+        return hops
+
+    def __contains__(self, map_name):
+        return map_name in self.index
+
+    def neighbours(self, map_name):
+        """Return the API names of the hexes bordering a hex"""
+        return [self.names[j] for j in np.flatnonzero(self.adjacency[self.index[map_name]])]
+
+    def hex_distance(self, map_a, map_b):
+        """Return the number of borders between two hexes (-1 if unreachable)"""
+        return int(self.hops[self.index[map_a], self.index[map_b]])
+
+    def to_world(self, map_name, x, y):
+        """
+        Convert a hex's 0-1 map coordinates to world coordinates
+
+        Args:
+            map_name: API map name
+            x, y: Scalars or arrays (e.g. snapshot columns)
+
+        Returns:
+            (world_x, world_y)
+        """
+        left, top = self.origins[self.index[map_name]]
+        return left + np.asarray(x, dtype=np.float64), top + np.asarray(y, dtype=np.float64) * HEX_ASPECT
+
+    def to_local(self, map_name, world_x, world_y):
+        """Convert world coordinates to a hex's 0-1 map coordinates (outside 0-1 beyond its image)"""
+        left, top = self.origins[self.index[map_name]]
+        return np.asarray(world_x, dtype=np.float64) - left, (np.asarray(world_y, dtype=np.float64) - top) / HEX_ASPECT
+
+    def hex_at(self, world_x, world_y):
+        """Return the API name of the hex containing a world point, or None if it is off the map"""
+        # Fractional axial coordinates, rounded to the nearest hex in cube space
+        q = world_x / 0.75
+        r = world_y / HEX_ASPECT - q / 2
+        s = -q - r
+        rq, rr, rs = round(q), round(r), round(s)
+        dq, dr, ds = abs(rq - q), abs(rr - r), abs(rs - s)
+        if dq > dr and dq > ds:
+            rq = -rr - rs
+        elif dr > ds:
+            rr = -rq - rs
+        matches = np.flatnonzero((self.axial[:, 0] == rq) & (self.axial[:, 1] == rr))
+        return self.names[matches[0]] if matches.size else None
+
+    def distance(self, map_a, x_a, y_a, map_b, x_b, y_b):
+        """Return the distance in hex widths between points of two (possibly different) hexes"""
+        ax, ay = self.to_world(map_a, x_a, y_a)
+        bx, by = self.to_world(map_b, x_b, y_b)
+        return np.hypot(bx - ax, by - ay)
+
+    def lower_bounds(self, world_x, world_y):
+        """Return, for every hex, a lower bound on its distance from a world point"""
+        return np.maximum(np.hypot(self.centres[:, 0] - world_x, self.centres[:, 1] - world_y) - _IMAGE_RADIUS, 0.0)
+
+WORLD_LAYOUT = WorldLayout()